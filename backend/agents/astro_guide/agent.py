@@ -8,29 +8,63 @@ object detection, then combines this data with its knowledge and web searches to
 fascinating narratives about what the user is seeing.
 """
 
-from google.adk.tools.agent_tool import AgentTool
 from google.adk.tools.google_search_tool import GoogleSearchTool
+import asyncio
 import os
-import sys
-import io
 from pathlib import Path
+from typing import Optional
 
 import google.genai.types as types
 from google.adk.tools.function_tool import FunctionTool
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.agent_tool import AgentTool
 
-# Add project root to path so we can import from src
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from google.adk.agents import Agent
-from src.tools.capture_sky.tool import SkyCaptureTool
+from src.tools.capture_sky.tool import get_sky_capture_tool
+from src.tools.capture_sky.types import PlateSolvingHints
+from src.utils import load_prompt
 from agents.observation_planner.agent import root_agent as observation_planner_agent
 
 # from src.tools.search.ddg_tool import web_search
 
-async def capture_sky(tool_context: ToolContext, image_artifact_name: str) -> dict:
+# Session state key for the pixel scale of the last solved capture. Captures in
+# one session usually come from the same telescope and camera.
+_PIXEL_SCALE_STATE_KEY = "capture_sky_pixel_scale_arcsec"
+
+_DEEP_SKY_KEYWORDS = ("nebula", "galaxy", "cluster")
+
+
+def _object_interest_score(obj: dict) -> float:
+    """Rank deep-sky objects first, then naked-eye stars, then by brightness."""
+    subtype = (obj.get("subtype") or "").lower()
+    magnitude = obj.get("magnitude_visual")
+
+    score = 0.0
+    if obj.get("type") == "Messier":
+        score += 10
+    if any(keyword in subtype for keyword in _DEEP_SKY_KEYWORDS):
+        score += 8
+    if magnitude is not None and magnitude < 6:
+        score += 4
+    score -= magnitude if magnitude is not None else 10
+    return score
+
+
+def _select_objects_for_llm(objects: list, max_objects: int) -> list:
+    """Keep the most interesting objects and drop empty fields to save tokens."""
+    ranked = sorted(objects, key=_object_interest_score, reverse=True)[:max(max_objects, 0)]
+    return [{key: value for key, value in obj.items() if value is not None} for obj in ranked]
+
+
+async def capture_sky(
+    tool_context: ToolContext,
+    image_artifact_name: str,
+    pixel_scale_arcsec: Optional[float] = None,
+    center_ra_deg: Optional[float] = None,
+    center_dec_deg: Optional[float] = None,
+    search_radius_deg: Optional[float] = None,
+    max_objects: int = 10,
+) -> dict:
     """
     Captures an image from the telescope camera and identifies stars and point sources.
     
@@ -43,6 +77,13 @@ async def capture_sky(tool_context: ToolContext, image_artifact_name: str) -> di
     
     Args:
         image_artifact_name: The name of the image artifact file to analyze.
+        pixel_scale_arcsec: Optional approximate image scale in arcseconds per pixel.
+            Greatly speeds up solving. Defaults to the scale of the previous capture in this session.
+        center_ra_deg: Optional approximate RA of the image center in degrees.
+        center_dec_deg: Optional approximate DEC of the image center in degrees.
+        search_radius_deg: Optional search radius around the center in degrees (default 5).
+        max_objects: Maximum number of identified objects to return, most interesting first
+            (deep-sky objects, then bright stars). Increase it only if you need more.
 
     Returns:
         A dictionary containing:
@@ -50,36 +91,56 @@ async def capture_sky(tool_context: ToolContext, image_artifact_name: str) -> di
         - error: Error message if success is False
         - annotated_image_artifact: Name of the artifact containing the annotated image
         - plate_solving: Sky coordinates of the image center (RA/DEC), field of view, pixel scale
-        - objects: Dictionary with:
-            - identified_count: Number of objects identified via SIMBAD (mostly stars)
-            - identified: List of identified objects.
+        - identified_total: Number of objects identified via SIMBAD (mostly stars)
+        - identified_objects: The top `max_objects` identified objects.
     """
     try:
-        # Call the capture_sky function using file path method
-        sky_result = SkyCaptureTool().capture_sky_from_file(image_path=image_artifact_name)
+        # Without an explicit scale, reuse the last one solved in this session,
+        # dropping it if the setup has changed and nothing solves with it
+        remembered_scale = tool_context.state.get(_PIXEL_SCALE_STATE_KEY)
+        use_remembered_scale = pixel_scale_arcsec is None and remembered_scale is not None
+        hints = PlateSolvingHints(
+            pixel_scale_arcsec=remembered_scale if use_remembered_scale else pixel_scale_arcsec,
+            center_ra=center_ra_deg,
+            center_dec=center_dec_deg,
+            retry_without_scale=use_remembered_scale,
+        )
+        if search_radius_deg is not None:
+            hints.search_radius_deg = search_radius_deg
         
-        # Load and save the annotated image as an artifact
-        logs_dir = sky_result.get("logs_dir")
-        if logs_dir:
-            annotated_path = os.path.join(logs_dir, "annotated.png")
-            if os.path.exists(annotated_path):
-                try:
-                    with open(annotated_path, "rb") as f:
-                        annotated_data = f.read()
-                    
-                    # Save as artifact - this stores the image efficiently
-                    artifact_name = "annotated_sky_capture.png"
-                    await tool_context.save_artifact(
-                        filename=artifact_name,
-                        artifact=types.Part.from_bytes(
-                            data=annotated_data,
-                            mime_type="image/png"
-                        )
+        # Plate solving, SIMBAD lookups and image encoding all block, so run
+        # the capture off the event loop
+        sky_result = await asyncio.to_thread(
+            get_sky_capture_tool().capture_sky_from_file, image_path=image_artifact_name, hints=hints
+        )
+
+        solved_scale = sky_result.get("plate_solving", {}).get("pixel_scale_arcsec")
+        if solved_scale:
+            tool_context.state[_PIXEL_SCALE_STATE_KEY] = solved_scale
+
+        # Save the already encoded annotated image as an artifact. The save
+        # is awaited: the model may open the artifact as soon as it sees its
+        # name, and ADK records the artifact delta only once the save returns
+        annotated_data = sky_result.pop("annotated_image_bytes", None)
+        annotated_mime = sky_result.pop("annotated_image_mime", "image/jpeg")
+        if annotated_data:
+            try:
+                artifact_name = "annotated_sky_capture.jpg"
+                await tool_context.save_artifact(
+                    filename=artifact_name,
+                    artifact=types.Part.from_bytes(
+                        data=annotated_data,
+                        mime_type=annotated_mime
                     )
-                    sky_result["annotated_image_artifact"] = artifact_name
-                except Exception as e:
-                    sky_result["annotated_image_error"] = f"Failed to save annotated image artifact: {str(e)}"
+                )
+                sky_result["annotated_image_artifact"] = artifact_name
+            except Exception as e:
+                sky_result["annotated_image_error"] = f"Failed to save annotated image artifact: {str(e)}"
             
+        identified_objects = sky_result.get("identified_objects", [])
+        sky_result["identified_total"] = len(identified_objects)
+        sky_result["identified_objects"] = _select_objects_for_llm(identified_objects, max_objects)
+
         # Remove logs_dir from result (internal detail)
         if "logs_dir" in sky_result:
             del sky_result["logs_dir"]
@@ -99,11 +160,7 @@ search_tool = GoogleSearchTool(bypass_multi_tools_limit=True)
 
 
 # Read the only prompt from the markdown file
-import re
-
-with open("./agents/astro_guide/prompt.md", "r") as f:
-    prompt =  f.read()
-    prompt = re.sub(r"<!--.*?-->", "", prompt, flags=re.DOTALL)
+prompt = load_prompt(Path(__file__).with_name("prompt.md"))
 
 # Define the root agent
 root_agent = Agent(
@@ -122,7 +179,6 @@ from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from starlette.applications import Starlette
-from starlette.middleware.cors import CORSMiddleware
 
 from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor, A2aAgentExecutorConfig
 from google.adk.a2a.converters.request_converter import convert_a2a_request_to_agent_run_request
@@ -175,15 +231,9 @@ _request_handler = DefaultRequestHandler(
     task_store=_task_store,
 )
 
-# Empty Starlette app — routes are added during startup via setup_a2a()
+# Empty Starlette app — routes are added during startup via setup_a2a().
+# CORS is handled by the parent API app it is mounted on.
 a2a_app = Starlette()
-a2a_app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
 
 async def setup_a2a():
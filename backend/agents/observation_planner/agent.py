@@ -9,20 +9,16 @@ to create personalized, time-ordered observation plans.
 
 from google.adk.tools.google_search_tool import GoogleSearchTool
 import os
-import sys
-import re
 from pathlib import Path
 from datetime import datetime, timezone
 from google.adk.tools.function_tool import FunctionTool
 
-# Add project root to path so we can import from src
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from src.tools.observation_planning.conditions import get_observation_conditions
 from src.tools.observation_planning.catalog_search import search_observable_objects
 from src.tools.observation_planning.visibility import calculate_object_visibility
+from src.utils import load_prompt
 
 # Observation planning tools
 obs_conditions_tool = FunctionTool(func=get_observation_conditions)
@@ -32,17 +28,20 @@ visibility_tool = FunctionTool(func=calculate_object_visibility)
 search_tool = GoogleSearchTool(bypass_multi_tools_limit=True)
 
 # Read the prompt from the markdown file
-with open("./agents/observation_planner/prompt.md", "r") as f:
-    prompt = f.read()
-    prompt = re.sub(r"<!--.*?-->", "", prompt, flags=re.DOTALL)
-    prompt = prompt.replace("{{current_utc_date}}", datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+prompt = load_prompt(Path(__file__).with_name("prompt.md"))
+
+
+def build_instruction(context: ReadonlyContext) -> str:
+    """Fill in the current date on every request so it never goes stale."""
+    return prompt.replace("{{current_utc_date}}", datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+
 
 # Define the root agent
 root_agent = Agent(
     model="gemini-3-flash-preview",
     name="observation_planner",
     description="An astronomical observation planner that helps users create personalized observation plans based on their location, equipment, and interests.",
-    instruction=prompt,
+    instruction=build_instruction,
     tools=[
         search_tool,
         obs_conditions_tool,
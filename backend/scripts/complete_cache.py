@@ -1,7 +1,10 @@
 import os
+import re
 import sys
 import json
 import logging
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -13,6 +16,34 @@ from src.tools.capture_sky.simbad_query import query_simbad_by_id
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Concurrent SIMBAD lookups, kept within SIMBAD's ~6 queries/sec guidance
+MAX_WORKERS = 6
+
+# Catalog ids written without a space, e.g. M42 or NGC2024
+_CATALOG_SPLIT = re.compile(r'^([A-Z]+)(\d+)$')
+
+
+def _simbad_query_name(name):
+    """Return the spaced form of catalog ids (M42 -> M 42), which SIMBAD resolves more reliably for M, NGC and IC."""
+    match = _CATALOG_SPLIT.match(name)
+    return f"{match.group(1)} {match.group(2)}" if match else name
+
+
+def _lookup_object(name, config):
+    """Query SIMBAD by name, retrying with a space for catalog ids like M42 -> M 42."""
+    logger.info(f"  Querying SIMBAD for: {name}")
+    simbad_obj = query_simbad_by_id(name, config)
+    
+    # If it fails, try adding a space for common catalogs (M, NGC, IC)
+    if not simbad_obj:
+        alt_name = _simbad_query_name(name)
+        if alt_name != name:
+            logger.info(f"    Failed. Trying alternative format: {alt_name}")
+            simbad_obj = query_simbad_by_id(alt_name, config)
+    
+    return simbad_obj
+
+
 def complete_cache():
     config = get_config_from_env()
     cache_path = os.path.join('src', 'tools', 'capture_sky', 'analysis_cache.json')
@@ -21,30 +52,33 @@ def complete_cache():
         logger.error(f"Cache file not found at {cache_path}")
         return
 
-    with open(cache_path, 'r') as f:
-        cache = json.load(f)
+    with open(cache_path, 'rb') as f:
+        cache = orjson.loads(f.read())
 
     updated_any = False
 
+    # Collect every object that needs completion (e.g., missing celestial_coords or type)
+    pending = [
+        obj
+        for result in cache.values()
+        for obj in result.get('identified_objects', [])
+        if obj.get('name') and ('celestial_coords' not in obj or 'type' not in obj)
+    ]
+    names = sorted({obj['name'] for obj in pending})
+    
+    # Resolve each distinct name once, in parallel
+    logger.info(f"Querying SIMBAD for {len(names)} objects...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        resolved = dict(zip(names, executor.map(lambda name: _lookup_object(name, config), names)))
+
     for image_hash, result in cache.items():
         logger.info(f"Processing image hash: {image_hash}")
         identified_objects = result.get('identified_objects', [])
         
         for obj in identified_objects:
             name = obj.get('name')
-            # Check if it needs completion (e.g., missing celestial_coords or type)
-            if name and ('celestial_coords' not in obj or 'type' not in obj):
-                logger.info(f"  Querying SIMBAD for: {name}")
-                simbad_obj = query_simbad_by_id(name, config)
-                
-                # If it fails, try adding a space for common catalogs (M, NGC, IC)
-                if not simbad_obj:
-                    import re
-                    match = re.match(r'^([A-Z]+)(\d+)$', name)
-                    if match:
-                        alt_name = f"{match.group(1)} {match.group(2)}"
-                        logger.info(f"    Failed. Trying alternative format: {alt_name}")
-                        simbad_obj = query_simbad_by_id(alt_name, config)
+            if name in resolved and ('celestial_coords' not in obj or 'type' not in obj):
+                simbad_obj = resolved[name]
                 
                 if simbad_obj:
                     # Map CelestialObject fields to the JSON structure
@@ -98,8 +132,12 @@ def complete_cache():
                 updated_any = True
 
     if updated_any:
-        with open(cache_path, 'w') as f:
+        # Write to a temp file and swap it in so a crash never leaves a truncated cache.
+        # Pretty-printed on purpose: the cache is checked in and reviewed as a diff.
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(cache, f, indent=4)
+        os.replace(tmp_path, cache_path)
         logger.info(f"Successfully updated {cache_path}")
     else:
         logger.info("No updates needed.")
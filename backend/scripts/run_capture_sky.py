@@ -13,6 +13,7 @@ Usage:
     WEBCAM_INDEX=1 python run_tool.py --simbad-radius 30.0
 """
 
+import io
 import os
 import json
 import argparse
@@ -158,16 +159,12 @@ def main():
     if image is None:
         return 1
     
-    # Save to temporary file to pass to tool
-    temp_capture_path = "temp_capture_for_analysis.png"
-    image.save(temp_capture_path)
-    print(f"Captured temporary image for analysis: {temp_capture_path}")
+    # Encode in memory and pass the bytes to the tool
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    print("Captured image for analysis")
         
-    SkyCaptureTool().capture_sky(image_path=temp_capture_path)
-
-    # Clean up
-    if os.path.exists(temp_capture_path):
-        os.remove(temp_capture_path)
+    SkyCaptureTool().capture_sky_from_bytes(buffer.getvalue())
 
     print("\n✅ Analysis completed")
     
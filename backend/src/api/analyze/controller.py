@@ -3,39 +3,182 @@ Controller for the /analyze endpoint.
 """
 
 import asyncio
+import base64
+import contextlib
+import logging
 import os
+import threading
 import uuid
-import base64
-import json
 import io
+import orjson
+from typing import Optional
 from PIL import Image
 
 from fastapi import UploadFile
 
-from src.tools.capture_sky.tool import SkyCaptureTool
+from src.tools.capture_sky.tool import get_sky_capture_tool
 from src.tools.capture_sky.gemini_identifier import GeminiStructureIdentifier
 from src.tools.capture_sky.simbad_query import query_simbad_by_id
 from src.services.narration_generator import NarrationGenerator
 from src.services.tts_service import TTSService
 from src.config import get_config_from_env
 
+logger = logging.getLogger(__name__)
+
+# SSE events are framed here once: sse-starlette sends bytes as they are,
+# instead of re-encoding every message through ServerSentEvent
+_SSE_SEP = b"\r\n"
+_EVENT_PREFIXES = {
+    name: b"event: " + name.encode("ascii") + _SSE_SEP + b"data: "
+    for name in (
+        "analyzing_image", "analysis_complete", "generating_narration", "narration_complete",
+        "generating_audio", "audio_chunk", "audio_complete", "error",
+    )
+}
+
+# PCM bytes per audio_chunk event: 64 KiB of base64, and a whole number of
+# 16-bit samples that base64-encodes without padding
+_AUDIO_EVENT_BYTES = 48 * 1024
 
-# Directory for temporary audio files
+# Vision-only guesses at or above this confidence are used as they are; only
+# less certain guesses get the grounded refinement pass
+_REFINE_BELOW_CONFIDENCE = 0.7
 
 
-def _ensure_audios_dir() -> str:
-    config = get_config_from_env()
-    audios_dir = os.path.join(config.storage_dir, "audios")
+def _event(name: str, payload) -> bytes:
+    """
+    Frame an SSE event. Numpy scalars from the analysis are allowed in the payload.
+    
+    Compact orjson output never contains newlines, so it always fits on a single data line.
+    """
+    data = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return b"".join((_EVENT_PREFIXES[name], data, _SSE_SEP, _SSE_SEP))
+
+
+# Events that carry no data
+_ANALYZING_IMAGE_EVENT = _event("analyzing_image", {})
+_GENERATING_NARRATION_EVENT = _event("generating_narration", {})
+_GENERATING_AUDIO_EVENT = _event("generating_audio", {})
+
+
+async def _iterate_in_thread(iterator, maxsize: int = 32):
+    """
+    Consume a blocking iterator in a worker thread and yield its items asynchronously.
+    
+    At most maxsize items are buffered: the worker waits while a slow client
+    catches up, and stops (closing the iterator) if the consumer goes away.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    done = object()
+    stopped = threading.Event()
+    
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+    
+    def produce():
+        try:
+            for item in iterator:
+                put(item)
+                if stopped.is_set():
+                    break
+        except Exception as e:
+            if not stopped.is_set():
+                put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            if not stopped.is_set():
+                put(done)
+    
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+    finally:
+        stopped.set()
+        # Make room for a worker blocked on a full queue so it can notice the stop
+        while not queue.empty():
+            queue.get_nowait()
+
 
-    """Ensure audios directory exists and return its path."""
-    os.makedirs(audios_dir, exist_ok=True)
-    return audios_dir
+def _decode_image(image_bytes: bytes) -> Image.Image:
+    """Decode the upload once. The pixels are loaded eagerly so the image can be shared across threads."""
+    pil_image = Image.open(io.BytesIO(image_bytes))
+    pil_image.load()
+    return pil_image
+
+
+async def _identify_main_structure(
+    pil_image: Image.Image,
+    identified_objects: Optional[list] = None,
+    plate_solving: Optional[dict] = None,
+    preliminary: Optional[dict] = None
+):
+    """
+    Identify the main structure with Gemini and look it up in SIMBAD.
+    
+    Without identified_objects and plate_solving, Gemini only sees the pixels,
+    so this first guess can run alongside plate solving. With them, Gemini
+    refines the preliminary guess using the plate solution and identified stars.
+    
+    Returns:
+        Tuple of (Gemini result, CelestialObject), with None for whatever
+        could not be identified. Errors are logged and never raised.
+    """
+    try:
+        config = get_config_from_env()
+        gemini_identifier = GeminiStructureIdentifier(config)
+        
+        main_structure = await asyncio.to_thread(
+            gemini_identifier.identify_main_structure,
+            pil_image,
+            identified_objects,
+            plate_solving,
+            preliminary
+        )
+        if not main_structure:
+            logger.info("Gemini did not identify a specific main structure")
+            return None, None
+        
+        main_name = main_structure.get("name")
+        logger.info("Gemini identified main structure: %s", main_name)
+        
+        # Query SIMBAD for details
+        simbad_obj = await asyncio.to_thread(query_simbad_by_id, main_name, config)
+        if not simbad_obj:
+            logger.info("Could not find '%s' in SIMBAD", main_name)
+        return main_structure, simbad_obj
+        
+    except Exception as e:
+        logger.exception("Error in Gemini step: %s", e)
+        return None, None
+
+
+def _needs_refinement(main_structure: Optional[dict], simbad_obj) -> bool:
+    """Whether the vision-only guess is too weak to use without the grounded prompt."""
+    if not main_structure or simbad_obj is None:
+        return True
+    try:
+        confidence = float(main_structure.get("confidence", 1.0))
+    except (TypeError, ValueError):
+        return True
+    return confidence < _REFINE_BELOW_CONFIDENCE
 
 
 async def analyze_image_stream(
     image: UploadFile,
     language: str,
-    base_url: str
+    base_url: str,
+    audios_dir: str,
+    tts_semaphore: Optional[asyncio.Semaphore] = None
 ):
     """
     Analyze an astronomical image and yield progress updates via SSE.
@@ -44,116 +187,110 @@ async def analyze_image_stream(
         image: Uploaded image file
         language: ISO language code for narration
         base_url: Base URL for constructing audio download URLs
+        audios_dir: Existing directory the narration WAV is written to
+        tts_semaphore: Optional limit on concurrent TTS generations
     
     Yields:
-        Dict with "event" and "data" for SSE:
+        Framed SSE events (bytes):
         - analyzing_image: starts analysis
         - analysis_complete: plate_solving + identified_objects
         - narration_complete: title + text
+        - audio_chunk: base64 PCM chunk (16-bit mono, 24 kHz), repeated
         - audio_complete: audio_url (final event)
         - error: on failure
     """
     try:
-        # Read image and encode to base64 for SkyCaptureTool
+        # Read image bytes and pass them to SkyCaptureTool as is
         image_bytes = await image.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
         
         # Step 1: Analyze the image
-        yield {"event": "analyzing_image", "data": "{}"}
-        print("> Step 1: Analyzing image with SkyCaptureTool...")
+        yield _ANALYZING_IMAGE_EVENT
+        logger.info("Step 1: Analyzing image with SkyCaptureTool...")
+        
+        # Decode once and share the image between the sky analysis and Gemini
+        pil_image = await asyncio.to_thread(_decode_image, image_bytes)
+        
+        # Gemini only needs the image for a first guess at the main
+        # structure, so it runs while plate solving and SIMBAD lookups do
+        logger.info("Step 1.5: Identifying main structure with Gemini...")
+        structure_task = asyncio.create_task(_identify_main_structure(pil_image))
         
-        sky_tool = SkyCaptureTool()
-        analysis_result = await asyncio.to_thread(sky_tool.capture_sky, image_base64)
+        sky_tool = get_sky_capture_tool()
+        try:
+            analysis_result = await asyncio.to_thread(
+                sky_tool.capture_sky_from_bytes, image_bytes, image=pil_image
+            )
+        except Exception:
+            structure_task.cancel()
+            raise
         
         if not analysis_result.get("success"):
-            yield {"event": "error", "data": json.dumps({"error": analysis_result.get("error", "Image analysis failed")})}
+            structure_task.cancel()
+            yield _event("error", {"error": analysis_result.get("error", "Image analysis failed")})
             return
         
         plate_solving = analysis_result.get("plate_solving", {})
         identified_objects = analysis_result.get("identified_objects", [])
         
-        # Step 1.5: Identify main structure with Gemini
-        print("> Step 1.5: Identifying main structure with Gemini...")
-        try:
-            gemini_identifier = GeminiStructureIdentifier(get_config_from_env())
-            # We need a PIL image for Gemini
-            pil_image = Image.open(io.BytesIO(image_bytes))
-            
-            main_structure = await asyncio.to_thread(
-                gemini_identifier.identify_main_structure,
-                pil_image,
-                identified_objects,
-                plate_solving
+        main_structure, simbad_obj = await structure_task
+        if _needs_refinement(main_structure, simbad_obj):
+            # Step 1.6: Only an unsure guess, or one SIMBAD doesn't know,
+            # pays for a second Gemini call grounded on the plate solution
+            logger.info("Step 1.6: Refining main structure with the plate solution...")
+            refined_structure, refined_simbad_obj = await _identify_main_structure(
+                pil_image, identified_objects, plate_solving, main_structure
             )
+            if refined_simbad_obj is not None:
+                main_structure, simbad_obj = refined_structure, refined_simbad_obj
+        
+        if main_structure and simbad_obj:
+            # Calculate radius if missing in SIMBAD but present in Gemini
+            radius_arcsec = simbad_obj.position.radius_arcsec
+            pixel_coords = main_structure.get("pixel_coords", {})
             
-            if main_structure:
-                main_name = main_structure.get("name")
-                print(f"  Gemini identified main structure: {main_name}")
-                
-                # Query SIMBAD for details
-                config = get_config_from_env()
-                simbad_obj = await asyncio.to_thread(query_simbad_by_id, main_name, config)
-                
-                if simbad_obj:
-                     # Calculate radius if missing in SIMBAD but present in Gemini
-                     radius_arcsec = simbad_obj.position.radius_arcsec
-                     pixel_coords = main_structure.get("pixel_coords", {})
-                     
-                     if (not radius_arcsec or radius_arcsec == 0) and "radius_pixels" in pixel_coords:
-                         if plate_solving.get("pixel_scale_arcsec"):
-                             radius_arcsec = pixel_coords["radius_pixels"] * plate_solving["pixel_scale_arcsec"]
-                    
-                     structure_dict = {
-                        "name": simbad_obj.name,
-                        "type": simbad_obj.catalog,
-                        "subtype": simbad_obj.object_type_description,
-                        "celestial_coords": {
-                            "ra_deg": round(simbad_obj.position.ra, 6),
-                            "dec_deg": round(simbad_obj.position.dec, 6),
-                            "radius_arcsec": round(radius_arcsec, 2),
-                        },
-                        "pixel_coords": pixel_coords,
-                        "confidence": main_structure.get("confidence", 1.0)
-                     }
-                     
-                     # Add optional fields
-                     if simbad_obj.alternative_names:
-                         structure_dict["alternative_names"] = simbad_obj.alternative_names
-                     if simbad_obj.magnitude_visual:
-                         structure_dict["magnitude_visual"] = round(simbad_obj.magnitude_visual, 2)
-                     if simbad_obj.distance_lightyears:
-                         structure_dict["distance_lightyears"] = simbad_obj.distance_lightyears
-                     if simbad_obj.bv_color_index:
-                         structure_dict["bv_color_index"] = round(simbad_obj.bv_color_index, 2)
-                     if simbad_obj.spectral_type:
-                         structure_dict["spectral_type"] = simbad_obj.spectral_type
-                     if simbad_obj.morphological_type:
-                         structure_dict["morphological_type"] = simbad_obj.morphological_type
-
-                     # Insert at the beginning!
-                     identified_objects.insert(0, structure_dict)
-                else:
-                    print(f"  Could not find '{main_name}' in SIMBAD.")
-            else:
-                print("  Gemini did not identify a specific main structure.")
-                
-        except Exception as e:
-            print(f"  Error in Gemini step: {e}")
-            import traceback
-            traceback.print_exc()
+            if (not radius_arcsec or radius_arcsec == 0) and "radius_pixels" in pixel_coords:
+                if plate_solving.get("pixel_scale_arcsec"):
+                    radius_arcsec = pixel_coords["radius_pixels"] * plate_solving["pixel_scale_arcsec"]
+            
+            structure_dict = {
+                "name": simbad_obj.name,
+                "type": simbad_obj.catalog,
+                "subtype": simbad_obj.object_type_description,
+                "celestial_coords": {
+                    "ra_deg": round(simbad_obj.position.ra, 6),
+                    "dec_deg": round(simbad_obj.position.dec, 6),
+                    "radius_arcsec": round(radius_arcsec, 2),
+                },
+                "pixel_coords": pixel_coords,
+                "confidence": main_structure.get("confidence", 1.0)
+            }
+            
+            # Add optional fields
+            if simbad_obj.alternative_names:
+                structure_dict["alternative_names"] = simbad_obj.alternative_names
+            if simbad_obj.magnitude_visual:
+                structure_dict["magnitude_visual"] = round(simbad_obj.magnitude_visual, 2)
+            if simbad_obj.distance_lightyears:
+                structure_dict["distance_lightyears"] = simbad_obj.distance_lightyears
+            if simbad_obj.bv_color_index:
+                structure_dict["bv_color_index"] = round(simbad_obj.bv_color_index, 2)
+            if simbad_obj.spectral_type:
+                structure_dict["spectral_type"] = simbad_obj.spectral_type
+            if simbad_obj.morphological_type:
+                structure_dict["morphological_type"] = simbad_obj.morphological_type
+
+            # Insert at the beginning!
+            identified_objects.insert(0, structure_dict)
 
         # Yield analysis results
-        yield {
-            "event": "analysis_complete",
-            "data": json.dumps({
-                "plate_solving": plate_solving,
-                "identified_objects": identified_objects
-            })
-        }
+        yield _event("analysis_complete", {
+            "plate_solving": plate_solving,
+            "identified_objects": identified_objects
+        })
         
         # Step 2: Generate narration
-        yield {"event": "generating_narration", "data": "{}"}
-        print(f"> Step 2: Generating narration in '{language}'...")
+        yield _GENERATING_NARRATION_EVENT
+        logger.info("Step 2: Generating narration in '%s'...", language)
         
         narration_gen = NarrationGenerator()
         narration_result = await asyncio.to_thread(
@@ -171,45 +308,44 @@ async def analyze_image_stream(
                 obj["legend"] = object_legends[obj_name]
         
         # Yield narration results
-        yield {
-            "event": "narration_complete",
-            "data": json.dumps({
-                "title": narration_result.get("title", "The Night Sky"),
-                "text": narration_result.get("text", ""),
-                "object_legends": object_legends
-            })
-        }
+        yield _event("narration_complete", {
+            "title": narration_result.get("title", "The Night Sky"),
+            "text": narration_result.get("text", ""),
+            "object_legends": object_legends
+        })
         
         # Step 3: Generate TTS audio
-        yield {"event": "generating_audio", "data": "{}"}
-        print("> Step 3: Generating TTS audio...")
+        yield _GENERATING_AUDIO_EVENT
+        logger.info("Step 3: Generating TTS audio...")
         
         tts_service = TTSService(language=language)
         
         # Generate unique filename for audio
         audio_filename = f"narration_{uuid.uuid4().hex[:8]}.wav"
-        audios_dir = _ensure_audios_dir()
         audio_output_path = os.path.join(audios_dir, audio_filename)
         
-        _, saved_path = await asyncio.to_thread(
-            tts_service.generate_audio,
+        # Stream PCM chunks to the client while they are appended to the WAV file
+        audio_stream = tts_service.generate_audio_stream(
             narration_result.get("text", ""),
             audio_output_path
         )
+        async with tts_semaphore or contextlib.nullcontext():
+            async for chunk in _iterate_in_thread(audio_stream):
+                # Split large chunks so no single event has to hold the whole encoded audio
+                view = memoryview(chunk)
+                for start in range(0, len(view), _AUDIO_EVENT_BYTES):
+                    yield _event("audio_chunk", {
+                        "b64": base64.b64encode(view[start:start + _AUDIO_EVENT_BYTES]).decode("ascii")
+                    })
         
         # Build audio URL
         audio_url = f"{base_url}/audio/{audio_filename}"
         
         # Yield audio URL (final event)
-        yield {
-            "event": "audio_complete",
-            "data": json.dumps({"audio_url": audio_url})
-        }
+        yield _event("audio_complete", {"audio_url": audio_url})
         
-        print("> Analysis complete!")
+        logger.info("Analysis complete")
         
     except Exception as e:
-        print(f"Error during analysis: {e}")
-        import traceback
-        traceback.print_exc()
-        yield {"event": "error", "data": json.dumps({"error": str(e)})}
+        logger.exception("Error during analysis: %s", e)
+        yield _event("error", {"error": str(e)})
@@ -0,0 +1,26 @@
+"""
+Lookup of generated narration audio files.
+"""
+
+import os
+import stat
+
+
+def stat_audio_file(audios_dir: str, filename: str):
+    """
+    Resolve filename inside audios_dir and stat it with a single syscall.
+    
+    Returns:
+        Tuple of (path, stat_result), or None if the name escapes the
+        directory or is not an existing regular file.
+    """
+    path = os.path.realpath(os.path.join(audios_dir, filename))
+    if os.path.dirname(path) != audios_dir:
+        return None
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    return path, stat_result
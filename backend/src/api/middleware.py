@@ -0,0 +1,86 @@
+"""
+ASGI middleware for the API server.
+"""
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadLimitMiddleware:
+    """
+    Reject uploads to a path before their body is read.
+
+    Requests that are not multipart/form-data get a 415, and requests whose
+    Content-Length exceeds max_bytes get a 413, so oversized or bogus uploads
+    never reach the multipart parser. Bodies without a Content-Length
+    (chunked uploads) are counted as they are received instead: once they
+    pass max_bytes the client gets a 413 and the app sees a disconnect.
+    Written as plain ASGI so the SSE responses of the wrapped endpoint
+    stream through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+
+        if not headers.get("content-type", "").lower().startswith("multipart/form-data"):
+            response = Response(
+                content=b'{"error":"Expected a multipart/form-data upload"}',
+                status_code=415,
+                media_type="application/json"
+            )
+            await response(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject_too_large(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def receive_limited() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    if not response_started:
+                        await self._reject_too_large(scope, receive, send)
+                    # The app stops reading as if the client had gone away
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message: Message) -> None:
+            nonlocal response_started
+            # Drops the app's own error response after the 413 went out
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, receive_limited, send_unless_rejected)
+
+    async def _reject_too_large(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = Response(
+            content=b'{"error":"Upload too large"}',
+            status_code=413,
+            media_type="application/json"
+        )
+        await response(scope, receive, send)
@@ -5,62 +5,117 @@ FastAPI server providing the POST /analyze endpoint for astronomical image analy
 """
 
 from src.config import get_config_from_env
+import asyncio
+import logging
 import os
-import sys
-from pathlib import Path
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 from fastapi import FastAPI, Request, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 import uvicorn
 
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from sse_starlette.sse import EventSourceResponse
 
 from src.api.analyze.dto import AnalyzeResponse
 from src.api.analyze.controller import analyze_image_stream
+from src.api.audio_files import stat_audio_file
+from src.api.middleware import UploadLimitMiddleware
+from src.services.genai_client import get_genai_client
+from src.tools.capture_sky.tool import get_sky_capture_tool
 
 
 from fastapi.middleware.cors import CORSMiddleware
 
 from agents.astro_guide.agent import a2a_app, setup_a2a
 
+# Close the SSE stream when a client has not accepted an event for this many
+# seconds, so stalled clients don't pin the analysis and its buffers
+SSE_SEND_TIMEOUT = 30
+
+# Constant bodies, serialized once. A fresh Response is still built per
+# request because middleware may edit its headers in place.
+_HEALTH_BODY = b'{"status":"ok","service":"AstroIA API"}'
+_AUDIO_NOT_FOUND_BODY = b'{"error":"Audio file not found"}'
+
 # ============================================================================
 # FastAPI Application
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Set up shared state for the app's lifetime: logging, the TTS concurrency
+    limit, warm clients and the A2A routes on the mounted sub-app (mounted
+    sub-apps don't get their own lifespan).
+    """
+    # Configured here rather than in main() so every uvicorn worker gets it
+    app.state.log_listener = _configure_logging()
+    # Caps concurrent Gemini TTS streams per worker
+    app.state.tts_semaphore = asyncio.Semaphore(int(os.environ.get("TTS_MAX_CONCURRENCY", "8")))
+    # Resolved once; /audio only serves files directly inside it
+    app.state.audios_dir = os.path.realpath(os.path.join(get_config_from_env().storage_dir, "audios"))
+    os.makedirs(app.state.audios_dir, exist_ok=True)
+    await _warm_up()
+    await setup_a2a()
+    try:
+        yield
+    finally:
+        # Flush pending log records
+        app.state.log_listener.stop()
+
+
 app = FastAPI(
     title="AstroIA API",
     description="Astronomical image analysis API with AI-powered narration",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Added before CORS so its 413/415 responses still carry CORS headers
+app.add_middleware(
+    UploadLimitMiddleware,
+    path="/analyze",
+    max_bytes=int(os.environ.get("MAX_UPLOAD_MB", "32")) * 1024 * 1024,
 )
 
+# Also covers the mounted A2A app. Comma-separated list, "*" allows any origin.
+_cors_allow_origins = [
+    origin.strip() for origin in os.environ.get("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=_cors_allow_origins,
     # Wildcard origins are not compatible with credentials in browsers.
     # A2A and analyze endpoints do not require cookies.
     allow_credentials=False,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    # Let browsers cache preflight results for a day
+    max_age=86400,
 )
 
 # Mount A2A agent as a sub-application
 app.mount("/a2a", a2a_app)
 
 
-@app.on_event("startup")
-async def on_startup():
-    """Build the A2A agent card and register routes on the mounted sub-app."""
-    await setup_a2a()
+async def _warm_up():
+    """Build the shared sky capture tool and Gemini client so the first /analyze doesn't pay for it."""
+    try:
+        await asyncio.to_thread(get_sky_capture_tool)
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if api_key:
+            get_genai_client(api_key)
+    except Exception as e:
+        logging.getLogger(__name__).warning("Warm-up failed, clients will be created on first use: %s", e)
 
 
 @app.get("/")
 async def root():
     """Health check endpoint."""
-    return {"status": "ok", "service": "AstroIA API"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.post("/analyze")
@@ -79,35 +134,76 @@ async def analyze(
     - event: analysis_finished (payload is AnalyzeResponse JSON)
     """
     base_url = str(req.base_url).rstrip("/")
-    return EventSourceResponse(analyze_image_stream(image, language, base_url))
+    return EventSourceResponse(
+        analyze_image_stream(image, language, base_url, req.app.state.audios_dir, req.app.state.tts_semaphore),
+        send_timeout=SSE_SEND_TIMEOUT
+    )
 
 
 @app.get("/audio/{filename}")
-async def get_audio(filename: str):
+async def get_audio(req: Request, filename: str):
     """
     Serve audio files from the audios directory.
-    """
-    config = get_config_from_env()
-    audios_dir = os.path.join(config.storage_dir, "audios")
     
-    if not os.path.exists(audios_dir):
-        return {"error": "Audio file not found"}, 404
+    FileResponse answers Range requests (Accept-Ranges: bytes) and sets
+    Content-Length, ETag and Last-Modified from the stat result, so browsers
+    can seek and revalidate without downloading the whole WAV again.
+    """
+    # Names that resolve outside the audios directory (.., symlinks) are
+    # reported as missing
+    resolved = await asyncio.to_thread(stat_audio_file, req.app.state.audios_dir, filename)
+    if resolved is None:
+        return Response(content=_AUDIO_NOT_FOUND_BODY, status_code=404, media_type="application/json")
+    audio_path, stat_result = resolved
     
     return FileResponse(
-        path=os.path.join(audios_dir, filename),
+        path=audio_path,
         media_type="audio/wav",
         filename=filename,
-        headers={"Access-Control-Allow-Origin": "*"}
+        stat_result=stat_result,
+        headers={
+            # Narration files get unique names and are never rewritten
+            "Cache-Control": "public, max-age=31536000, immutable",
+        }
     )
 
 
+def _configure_logging() -> QueueListener:
+    """
+    Send application logs through a queue to a background thread, so request
+    handlers never block writing to stdout. The level comes from LOG_LEVEL.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.handlers = [QueueHandler(log_queue)]
+    root_logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
 def main():
     """Run the API server."""
     host = os.environ.get("API_HOST", "0.0.0.0")
     port = int(os.environ.get("API_PORT", "8000"))
+    workers = int(os.environ.get("UVICORN_WORKERS", "1"))
+    limit_concurrency = int(os.environ.get("UVICORN_LIMIT_CONCURRENCY", "512"))
     
-    print(f"Starting AstroIA API server on {host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    print(f"Starting AstroIA API server on {host}:{port} with {workers} worker(s)")
+    # uvloop and httptools are picked up automatically when installed (uvicorn[standard]).
+    # Multiple workers need an import string so each process can load the app.
+    uvicorn.run(
+        app if workers == 1 else "src.api.server:app",
+        host=host,
+        port=port,
+        workers=workers,
+        limit_concurrency=limit_concurrency,
+        timeout_keep_alive=15,
+    )
 
 
 if __name__ == "__main__":
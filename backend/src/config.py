@@ -1,11 +1,12 @@
 import os
+import functools
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 import dotenv
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AppConfig:
-    """Configuration for the image analysis tool."""
+    """Configuration for the image analysis tool. Shared by the whole process, so immutable."""
     astrometry_api_key: str
     gemini_api_key: Optional[str]
     plate_solving_timeout: int
@@ -19,8 +20,20 @@ class AppConfig:
     astrometry_api_url: str
     storage_dir: str
     plate_solving_method: str
+    simbad_batch_query: bool
+    simbad_mirrors: Tuple[str, ...]
+    simbad_mirror_timeout: float
+    simbad_max_workers: int
+    test_mode: bool
+    astrometry_raw_upload: bool
         
+@functools.lru_cache(maxsize=1)
 def get_config_from_env() -> AppConfig:
+    """
+    Build the configuration from the environment (and .env) once per process.
+    
+    Call get_config_from_env.cache_clear() to re-read the environment.
+    """
     dotenv.load_dotenv()
 
     astrometry_api_key = os.environ.get("ASTROMETRY_API_KEY")
@@ -45,4 +58,14 @@ def get_config_from_env() -> AppConfig:
         astrometry_api_url=os.environ.get("ASTROMETRY_API_URL", "http://ec2-3-145-73-178.us-east-2.compute.amazonaws.com/solve"),
         storage_dir=os.environ.get("STORAGE_DIR", "/mnt/data"),
         plate_solving_method=plate_solving_method,
+        simbad_batch_query=os.environ.get("SIMBAD_BATCH_QUERY", "true").lower() == "true",
+        simbad_mirrors=tuple(
+            mirror.strip()
+            for mirror in os.environ.get("SIMBAD_MIRRORS", "simbad.cds.unistra.fr,simbad.harvard.edu").split(",")
+            if mirror.strip()
+        ),
+        simbad_mirror_timeout=float(os.environ.get("SIMBAD_MIRROR_TIMEOUT", "10")),
+        simbad_max_workers=int(os.environ.get("SIMBAD_MAX_WORKERS", "6")),
+        test_mode=os.environ.get("TEST_MODE", "false").lower() == "true",
+        astrometry_raw_upload=os.environ.get("ASTROMETRY_RAW_UPLOAD", "false").lower() == "true",
     )
\ No newline at end of file
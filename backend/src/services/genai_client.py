@@ -0,0 +1,18 @@
+"""
+Shared Gemini API clients.
+"""
+
+import functools
+
+from google import genai
+
+
+@functools.lru_cache(maxsize=4)
+def get_genai_client(api_key: str) -> genai.Client:
+    """
+    Return the process-wide Gemini client for an API key.
+    
+    The client keeps its HTTP connection pool, so reusing it avoids a new
+    TCP + TLS handshake on every request.
+    """
+    return genai.Client(api_key=api_key)
@@ -9,9 +9,14 @@ from typing import List, Dict, Any, Optional
 import os
 import json
 import dotenv
-from google import genai
 from google.genai import types
 
+from src.services.genai_client import get_genai_client
+
+# Load .env and read the API key once per process instead of per request
+dotenv.load_dotenv()
+_GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+
 
 # Prompt template - always in English, with language code placeholder
 NARRATION_PROMPT_TEMPLATE = """You are an expert astronomer and night sky tour guide. Your task is to generate a captivating narration about what is observed in a sky image.
@@ -90,14 +95,12 @@ class NarrationGenerator:
         Args:
             api_key: Google API key. If not provided, uses GOOGLE_API_KEY env var.
         """
-        dotenv.load_dotenv()
-        
         if api_key is None:
-            api_key = os.environ.get("GOOGLE_API_KEY")
+            api_key = _GOOGLE_API_KEY
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY environment variable is not set")
         
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_genai_client(api_key)
         self.model = "gemini-3-flash-preview"
     
     def generate(
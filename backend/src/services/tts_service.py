@@ -4,14 +4,20 @@ TTS Service
 Generates audio from text using the Gemini TTS API.
 """
 
-import base64
+import functools
 import os
+import struct
 import wave
-from typing import Optional, Tuple, Dict
+from typing import Dict, Iterator, Optional, Tuple
 import dotenv
-from google import genai
 from google.genai import types
 
+from src.services.genai_client import get_genai_client
+
+# Load .env and read the API key once per process instead of per request
+dotenv.load_dotenv()
+_GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+
 
 def _save_wave_file(
     filename: str,
@@ -21,11 +27,23 @@ def _save_wave_file(
     sample_width: int = 2
 ) -> None:
     """Save PCM audio data to a WAV file."""
-    with wave.open(filename, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(sample_width)
-        wf.setframerate(rate)
-        wf.writeframes(pcm_data)
+    # The whole buffer is known, so write the header once instead of letting
+    # wave patch it on close
+    header = _wav_header(len(pcm_data), channels, rate, sample_width)
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.write(pcm_data)
+
+
+def _wav_header(data_size: int, channels: int, rate: int, sample_width: int) -> bytes:
+    """Build the 44-byte RIFF/WAVE header for data_size bytes of PCM."""
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
 
 
 # Voice recommendations for common languages
@@ -47,10 +65,37 @@ LANGUAGE_VOICES: Dict[str, str] = {
 DEFAULT_VOICE = "Kore"
 
 
+@functools.lru_cache(maxsize=32)
+def _content_prefix(language: str) -> str:
+    """Speaking instructions for a language; only the narration text changes per request."""
+    # Prompt always in English, language specified for output
+    return f"""Speak in a warm, enthusiastic, and conversational tone. 
+You are an expert astronomer sharing fascinating discoveries with wonder and awe.
+Speak in {language} with natural pacing and emotional expression.
+
+Text to speak:
+"""
+
+
+@functools.lru_cache(maxsize=16)
+def _speech_config(voice: str) -> types.GenerateContentConfig:
+    """Audio generation config for a voice, built once per voice."""
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                    voice_name=voice,
+                )
+            ),
+        ),
+    )
+
+
 class TTSService:
     """Service for text-to-speech using Gemini TTS API."""
     
-    VOICES = ["Aoede", "Puck", "Kore", "Charon", "Fenrir", "Leda"]
+    VOICES = frozenset({"Aoede", "Puck", "Kore", "Charon", "Fenrir", "Leda"})
     
     def __init__(
         self,
@@ -66,14 +111,12 @@ class TTSService:
             language: ISO language code for voice selection and speech output.
             voice: Optional voice override.
         """
-        dotenv.load_dotenv()
-        
         if api_key is None:
-            api_key = os.environ.get("GOOGLE_API_KEY")
+            api_key = _GOOGLE_API_KEY
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY environment variable is not set")
         
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_genai_client(api_key)
         self.model = "gemini-2.5-flash-preview-tts"
         self.language = language
         
@@ -83,6 +126,12 @@ class TTSService:
         else:
             self.voice = LANGUAGE_VOICES.get(language, DEFAULT_VOICE)
     
+    def _build_content(self, text: str) -> str:
+        return _content_prefix(self.language) + text
+
+    def _build_config(self) -> types.GenerateContentConfig:
+        return _speech_config(self.voice)
+
     def generate_audio(
         self,
         text: str,
@@ -98,28 +147,11 @@ class TTSService:
         Returns:
             Tuple of (audio_bytes, saved_file_path)
         """
-        # Prompt always in English, language specified for output
-        content = f"""Speak in a warm, enthusiastic, and conversational tone. 
-You are an expert astronomer sharing fascinating discoveries with wonder and awe.
-Speak in {self.language} with natural pacing and emotional expression.
-
-Text to speak:
-{text}"""
-        
         # Call Gemini TTS API
         response = self.client.models.generate_content(
             model=self.model,
-            contents=content,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=self.voice,
-                        )
-                    ),
-                ),
-            )
+            contents=self._build_content(text),
+            config=self._build_config()
         )
         
         # Extract audio data
@@ -142,21 +174,50 @@ Text to speak:
         
         return audio_data, saved_path
     
-    def generate_audio_base64(
+    def generate_audio_stream(
         self,
         text: str,
         output_path: Optional[str] = None
-    ) -> Tuple[str, Optional[str]]:
+    ) -> Iterator[bytes]:
         """
-        Generate audio and return as base64 string.
+        Generate audio from text, yielding PCM chunks as they are synthesized.
+        
+        Chunks are raw 16-bit mono PCM at 24 kHz. If output_path is given, each
+        chunk is appended to a WAV file there as it arrives; the header is
+        finalized when the stream ends.
         
         Args:
             text: Text to convert to speech
             output_path: Optional path to save the WAV file
         
-        Returns:
-            Tuple of (base64_encoded_audio, saved_file_path)
+        Yields:
+            PCM audio chunks
         """
-        audio_bytes, saved_path = self.generate_audio(text, output_path)
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
-        return audio_base64, saved_path
+        wav_file = None
+        if output_path:
+            wav_file = wave.open(output_path, "wb")
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(24000)
+        
+        try:
+            received_any = False
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model,
+                contents=self._build_content(text),
+                config=self._build_config()
+            ):
+                if not chunk.candidates or not chunk.candidates[0].content:
+                    continue
+                for part in chunk.candidates[0].content.parts or []:
+                    if part.inline_data and part.inline_data.data:
+                        received_any = True
+                        if wav_file is not None:
+                            wav_file.writeframes(part.inline_data.data)
+                        yield part.inline_data.data
+            
+            if not received_any:
+                raise ValueError("Failed to generate audio: empty response from TTS API")
+        finally:
+            if wav_file is not None:
+                wav_file.close()
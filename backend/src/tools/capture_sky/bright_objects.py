@@ -0,0 +1,47 @@
+"""
+Spatial index of well-known bright objects.
+
+Indexes the curated Messier/Caldwell/NGC catalog of the observation planner
+so positions can be matched to a known object name without asking SIMBAD.
+"""
+
+import functools
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.tools.observation_planning.catalog_search import curated_catalog_positions
+
+
+def _unit_vectors(ra_deg, dec_deg) -> np.ndarray:
+    """Convert RA/DEC in degrees to unit vectors, so chord length tracks angular distance."""
+    ra = np.radians(ra_deg)
+    dec = np.radians(dec_deg)
+    return np.column_stack((np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)))
+
+
+@functools.lru_cache(maxsize=1)
+def _bright_object_index() -> Tuple[cKDTree, List[str]]:
+    """Build the KD-tree over the curated catalog once per process."""
+    positions = curated_catalog_positions()
+    names = [name for name, _, _ in positions]
+    ra = np.array([ra for _, ra, _ in positions])
+    dec = np.array([dec for _, _, dec in positions])
+    return cKDTree(_unit_vectors(ra, dec)), names
+
+
+def find_bright_object(ra: float, dec: float, radius_arcsec: float) -> Optional[str]:
+    """
+    Return the name of the closest curated object within radius_arcsec of a position.
+
+    Returns:
+        The catalog name (e.g. "M42", "NGC 253"), or None if nothing is that close.
+    """
+    tree, names = _bright_object_index()
+    # Chord length between unit vectors separated by the radius
+    max_chord = 2 * np.sin(np.radians(radius_arcsec / 3600.0) / 2)
+    distance, idx = tree.query(_unit_vectors(ra, dec)[0], distance_upper_bound=max_chord)
+    if not np.isfinite(distance):
+        return None
+    return names[idx]
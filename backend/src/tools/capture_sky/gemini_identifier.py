@@ -2,7 +2,8 @@
 Gemini Structure Identifier
 
 Uses Gemini Vision to identify the main astronomical structure in an image,
-grounded by surrounding identified objects (stars).
+grounded by surrounding identified objects (stars). A vision-only first guess
+can be made before plate solving and refined once the grounding is known.
 """
 
 import os
@@ -10,12 +11,12 @@ import json
 import base64
 import dotenv
 from typing import List, Dict, Any, Optional
-from google import genai
 from google.genai import types
 from PIL import Image
 import io
 
 from src.config import AppConfig
+from src.services.genai_client import get_genai_client
 
 IDENTIFICATION_PROMPT_TEMPLATE = """You are an expert astronomer. Your task is to identify the MAIN astronomical structure in this image.
 
@@ -29,6 +30,9 @@ Here is the list of identified objects with their pixel coordinates (x,y) in the
 Center Coordinates: RA {center_ra}, DEC {center_dec}
 Pixel Scale: {pixel_scale} arcsec/pixel
 
+## First Look
+{preliminary_context}
+
 ## Instruction
 Identify the single most prominent main structure in this image (e.g., a Nebula, Galaxy, Cluster, or a specific region of one).
 The stars listed above should help you confirm the exact framing.
@@ -46,6 +50,24 @@ If you cannot identify any distinct main structure other than the stars provided
 Output strictly valid JSON.
 """
 
+VISION_ONLY_PROMPT = """You are an expert astronomer. Your task is to identify the MAIN astronomical structure in this telescope image.
+
+## Instruction
+Identify the single most prominent main structure in this image (e.g., a Nebula, Galaxy, Cluster, or a specific region of one).
+Ignore individual field stars unless one is truly the striking feature (e.g. a bright planet).
+Look for extended objects like Nebulas (e.g. Orion Nebula, Lagoon Nebula), Galaxies (e.g. Andromeda), or Star Clusters.
+
+Return the result as a JSON object with the following fields:
+- "name": The common name of the object (e.g., "M 42", "Orion Nebula", "Andromeda Galaxy"). This name will be used to query SIMBAD, so prefer catalog names like Messier (M) number or NGC number if available, or well-known common names.
+- "pixel_coords": {{ "x": <approximate center x>, "y": <approximate center y>, "radius_pixels": <approximate radius> }} based on the image size ({width}x{height} pixels).
+- "confidence": A score from 0.0 to 1.0 indicating your confidence.
+- "reasoning": A brief explanation of why you identified this object based on its visual features.
+
+If you cannot identify any distinct main structure, return null for the object data.
+
+Output strictly valid JSON.
+"""
+
 class GeminiStructureIdentifier:
     def __init__(self, config: AppConfig):
         self.config = config
@@ -59,22 +81,28 @@ class GeminiStructureIdentifier:
              print("Warning: No Gemini/Google API key found. GeminiStructureIdentifier will be disabled.")
         
         if self.api_key:
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = get_genai_client(self.api_key)
             self.model = "gemini-2.0-flash" # Use a vision-capable model
 
     def identify_main_structure(
         self, 
         image: Image.Image,
-        identified_objects: List[Dict[str, Any]],
-        plate_solving: Dict[str, Any]
+        identified_objects: Optional[List[Dict[str, Any]]] = None,
+        plate_solving: Optional[Dict[str, Any]] = None,
+        preliminary: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Identify the main structure in the image.
         
+        Without identified objects and plate solving info, a vision-only prompt
+        is used, so the call can run before (or alongside) plate solving. With
+        them, the grounded prompt confirms or corrects the preliminary guess.
+        
         Args:
             image: PIL Image object
-            identified_objects: List of currently identified objects (mostly stars)
-            plate_solving: Plate solving info (ra, dec, scale)
+            identified_objects: Optional list of currently identified objects (mostly stars)
+            plate_solving: Optional plate solving info (ra, dec, scale)
+            preliminary: Optional result of an earlier vision-only call to refine
             
         Returns:
             Dict with 'name', 'pixel_coords', etc., or None if failed/no key.
@@ -83,16 +111,20 @@ class GeminiStructureIdentifier:
             return None
 
         try:
-            # 1. Format context
-            context_str = self._format_objects_context(identified_objects)
-            
-            # 2. Build prompt
-            prompt = IDENTIFICATION_PROMPT_TEMPLATE.format(
-                identified_objects_context=context_str,
-                center_ra=plate_solving.get("center_ra_deg"),
-                center_dec=plate_solving.get("center_dec_deg"),
-                pixel_scale=plate_solving.get("pixel_scale_arcsec")
-            )
+            if identified_objects is None or plate_solving is None:
+                prompt = VISION_ONLY_PROMPT.format(width=image.width, height=image.height)
+            else:
+                # 1. Format context
+                context_str = self._format_objects_context(identified_objects)
+                
+                # 2. Build prompt
+                prompt = IDENTIFICATION_PROMPT_TEMPLATE.format(
+                    identified_objects_context=context_str,
+                    center_ra=plate_solving.get("center_ra_deg"),
+                    center_dec=plate_solving.get("center_dec_deg"),
+                    pixel_scale=plate_solving.get("pixel_scale_arcsec"),
+                    preliminary_context=self._format_preliminary_context(preliminary)
+                )
 
             # 3. Call Gemini
             # Resize image if too large to save bandwidth/tokens, though 2.0 Flash handles it well.
@@ -129,6 +161,18 @@ class GeminiStructureIdentifier:
             print(f"Error in GeminiStructureIdentifier: {e}")
             return None
 
+    def _format_preliminary_context(self, preliminary: Optional[Dict[str, Any]]) -> str:
+        if not preliminary:
+            return "No main structure was identified from the image alone."
+        
+        coords = preliminary.get("pixel_coords") or {}
+        return (
+            f"Looking at the image alone, before plate solving, the main structure was identified as "
+            f"\"{preliminary.get('name')}\" near ({coords.get('x', '?')}, {coords.get('y', '?')}) "
+            f"with confidence {preliminary.get('confidence', '?')}. "
+            f"Confirm or correct it using the coordinates and stars above."
+        )
+
     def _format_objects_context(self, identified_objects: List[Dict[str, Any]]) -> str:
         lines = []
         for obj in identified_objects:
@@ -0,0 +1,122 @@
+"""
+Shared HTTP session for the sky capture pipeline.
+
+Keeps connections to remote plate-solving servers alive across captures so
+repeated solves skip the DNS lookup and TLS handshake, and provides a
+circuit breaker so an unreachable server fails fast.
+"""
+
+import functools
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# urllib3 leaves POST out of its default retryable methods. Plate-solve
+# POSTs only read the uploaded image, so they are safe to repeat.
+RETRY_METHODS = frozenset({"HEAD", "GET", "OPTIONS", "POST"})
+
+
+def create_http_session() -> requests.Session:
+    """
+    Create a requests session with a small keep-alive pool and retries on
+    transient gateway errors.
+
+    A refused connection is retried once and read timeouts never are, so a
+    dead or stalled server costs at most two connect timeouts (or one solve
+    timeout) before callers, like the solver's circuit breaker, see the error.
+    """
+    retry = Retry(
+        total=3,
+        connect=1,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=RETRY_METHODS,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_session() -> requests.Session:
+    """Return the process-wide HTTP session, creating it on first use."""
+    return create_http_session()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter applying a default timeout to requests sent without one.
+
+    For sessions owned by third-party clients (astroquery, pyvo) that never
+    pass a timeout, so a stalled server can't block a thread forever.
+    """
+
+    def __init__(self, timeout: float, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def set_default_timeout(session: requests.Session, timeout: float) -> None:
+    """Make every request of a session without an explicit timeout use this connect/read timeout."""
+    adapter = TimeoutHTTPAdapter(timeout)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a remote service keeps failing.
+
+    After fail_max consecutive failures the circuit opens and calls are
+    refused for reset_timeout seconds. The first call after that is let
+    through as a trial: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, fail_max: int = 3, reset_timeout: float = 30.0):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the circuit is open."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"{self.name} unavailable (circuit open, retrying in {remaining:.0f}s)"
+                )
+            # Let this call through as the trial; others keep failing fast meanwhile
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
@@ -1,34 +1,127 @@
+import logging
 import os
 import tempfile
+from typing import List, Optional
+import requests
 from PIL import Image as PILImage
 from astropy.io.fits import Header
 from astroquery.astrometry_net import AstrometryNet
 from src.config import AppConfig
-from src.tools.capture_sky.plate_solver.plate_solver_interface import PlateSolver
+from src.tools.capture_sky.types import DetectedObject, PlateSolvingHints
+from src.tools.capture_sky.object_detector.contrast_detector import ContrastObjectDetector
+from src.tools.capture_sky.plate_solver.plate_solver_interface import NoSolutionError, PlateSolver
+
+logger = logging.getLogger(__name__)
+
+# Failures of a source-list solve after which uploading the image is still worth a try:
+# astroquery's job errors and solve timeout, and transport or response errors
+SOURCE_LIST_FALLBACK_ERRORS = (RuntimeError, TimeoutError, ValueError, requests.RequestException)
 
 class AstrometryNetPlateSolver(PlateSolver):
     """
     Plate solver that uses the official Astrometry.net service via the astrometry package.
+    
+    Sources are extracted locally and only the brightest ones are submitted, so the
+    request carries a short coordinate list instead of the whole image. The image is
+    uploaded only when too few sources are found. Sources passed in the hints are
+    used as they are, so the caller's detection isn't repeated.
     """
     
+    MAX_SOURCES = 50
+    MIN_SOURCES = 8
+    
     def __init__(self, config: AppConfig):
         self.config = config
         self.ast = AstrometryNet()
         self.ast.api_key = self.config.astrometry_api_key
+        self.source_detector = ContrastObjectDetector()
 
     @property
     def name(self) -> str:
         return "Astrometry.net"
 
-    def solve(self, image: PILImage.Image) -> Header:
+    @property
+    def uses_detected_sources(self) -> bool:
+        return True
+
+    def _hint_settings(self, hints: Optional[PlateSolvingHints]) -> dict:
+        """Translate plate solving hints into Astrometry.net job settings."""
+        settings = {}
+        if hints is None:
+            return settings
+        
+        if hints.pixel_scale_arcsec is not None:
+            settings.update(
+                scale_units='arcsecperpix',
+                scale_type='ev',
+                scale_est=hints.pixel_scale_arcsec,
+                scale_err=hints.scale_error_percent,
+            )
+        if hints.has_center:
+            settings.update(
+                center_ra=hints.center_ra,
+                center_dec=hints.center_dec,
+                radius=hints.search_radius_deg,
+            )
+        return settings
+
+    def _solve_from_sources(
+        self,
+        image: PILImage.Image,
+        settings: dict,
+        detected_sources: Optional[List[DetectedObject]] = None
+    ) -> Optional[Header]:
+        """
+        Submit the brightest detected sources as a source list.
+        
+        Sources are only detected here when the caller didn't pass any.
+        
+        Returns:
+            The WCS header, or None if there are too few sources to try.
+        """
+        if detected_sources is None:
+            detected_sources = self.source_detector.detect(image)
+        sources = detected_sources[:self.MAX_SOURCES]  # Brightest first
+        if len(sources) < self.MIN_SOURCES:
+            return None
+        
+        # Astrometry.net expects FITS (1-based) pixel coordinates
+        x = [obj.position.pixel_x + 1 for obj in sources]
+        y = [obj.position.pixel_y + 1 for obj in sources]
+        width, height = image.size
+        
+        return self.ast.solve_from_source_list(
+            x, y, width, height,
+            solve_timeout=self.config.plate_solving_timeout,
+            **settings
+        )
+
+    def solve(self, image: PILImage.Image, hints: Optional[PlateSolvingHints] = None) -> Header:
         """
         Perform plate solving using Astrometry.net.
+        
+        Scale and center hints, when given, let the solver skip the blind search.
         """
         if not self.config.astrometry_api_key:
              raise ValueError("ASTROMETRY_API_KEY is required for Astrometry.net solver")
 
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            image.save(tmp, format='PNG')
+        settings = self._hint_settings(hints)
+        
+        try:
+            wcs_header = self._solve_from_sources(
+                image, settings, hints.detected_sources if hints else None
+            )
+            if wcs_header:
+                return wcs_header
+        except SOURCE_LIST_FALLBACK_ERRORS:
+            logger.warning("Astrometry.net source list solve failed, uploading the image instead", exc_info=True)
+
+        # Solving only uses star positions, so a single channel is enough.
+        # JPEG encodes several times faster than PNG and is much smaller to
+        # upload, while keeping star centroids intact at this quality.
+        upload_image = image if image.mode == 'L' else image.convert('L')
+        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
+            upload_image.save(tmp, format='JPEG', quality=90)
             tmp_path = tmp.name
 
         try:
@@ -36,14 +129,17 @@ class AstrometryNetPlateSolver(PlateSolver):
             wcs_header = self.ast.solve_from_image(
                 tmp_path, 
                 solve_timeout=self.config.plate_solving_timeout,
-                force_image_upload=True
+                force_image_upload=True,
+                **settings
             )
             
             if wcs_header:
                 return wcs_header
             else:
-                 raise RuntimeError("Astrometry.net failed to solve the image (no WCS returned).")
+                 raise NoSolutionError("Astrometry.net failed to solve the image (no WCS returned).")
 
+        except NoSolutionError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Error during Astrometry.net plate solving: {e}") from e
         finally:
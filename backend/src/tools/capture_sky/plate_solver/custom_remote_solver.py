@@ -1,41 +1,99 @@
+import gzip
+import io
 import json
-import tempfile
-import os
+import logging
 import requests
 import pickle
+import numpy as np
 from typing import Optional
 from PIL import Image as PILImage
 from astropy.io.fits import Header
 from src.config import AppConfig
-from src.tools.capture_sky.plate_solver.plate_solver_interface import PlateSolver
+from src.tools.capture_sky.types import PlateSolvingHints
+from src.tools.capture_sky.http_session import CircuitBreaker, get_http_session
+from src.tools.capture_sky.plate_solver.plate_solver_interface import NoSolutionError, PlateSolver
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the server doesn't take raw uploads, so PNG is used instead
+RAW_UPLOAD_UNSUPPORTED_STATUSES = (400, 404, 415)
+
+# Seconds to establish the connection; kept just above a TCP retransmit window
+CONNECT_TIMEOUT = 3.05
+# Extra seconds allowed on top of the solve timeout for the upload and response
+READ_TIMEOUT_MARGIN = 30
+
+# Consecutive connection errors or 5xx responses before solves fail fast,
+# and for how long
+CIRCUIT_FAIL_MAX = 3
+CIRCUIT_RESET_SECONDS = 30
+
 
 class CustomRemotePlateSolver(PlateSolver):
     """
     Plate solver that uses a custom remote HTTP API.
     """
     
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, session: Optional[requests.Session] = None):
         self.config = config
+        # Reuse a keep-alive session so consecutive solves share the connection
+        self.session = session if session is not None else get_http_session()
+        self.breaker = CircuitBreaker("Astrometry server", CIRCUIT_FAIL_MAX, CIRCUIT_RESET_SECONDS)
 
     @property
     def name(self) -> str:
         return "CustomRemoteServer"
 
-    def solve(self, image: PILImage.Image) -> Header:
+    def solve(self, image: PILImage.Image, hints: Optional[PlateSolvingHints] = None) -> Header:
         """
         Perform plate solving using the custom remote server.
+        
+        Hints are sent as form fields using solve-field's option names.
+        With astrometry_raw_upload enabled, the pixels are first sent
+        unencoded, falling back to PNG if the server rejects them. After
+        repeated connection errors or 5xx responses, solves fail immediately
+        for a cooldown period instead of waiting on the server.
         """
         # Perform plate solving
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            image.save(tmp, format='PNG')
-            tmp_path = tmp.name
+        # Solving only uses star positions, so a single channel is enough
+        # and a third of the upload
+        upload_image = image if image.mode == 'L' else image.convert('L')
         
         try:
             # Use self-hosted astrometry server
             url = self.config.astrometry_api_url
             
-            with open(tmp_path, 'rb') as f:
-                response = requests.post(url, files={'image': f})
+            data = {}
+            if hints is not None:
+                if hints.pixel_scale_arcsec is not None:
+                    data['scale_units'] = 'arcsecperpix'
+                    data['scale_low'] = hints.pixel_scale_arcsec * (1 - hints.scale_error_percent / 100)
+                    data['scale_high'] = hints.pixel_scale_arcsec * (1 + hints.scale_error_percent / 100)
+                if hints.has_center:
+                    data['ra'] = hints.center_ra
+                    data['dec'] = hints.center_dec
+                    data['radius'] = hints.search_radius_deg
+            
+            # Fails fast while the server is known to be down
+            self.breaker.before_call()
+            try:
+                response = None
+                if self.config.astrometry_raw_upload:
+                    response = self._post_raw(url, upload_image, data)
+                    if response.status_code in RAW_UPLOAD_UNSUPPORTED_STATUSES:
+                        logger.warning(f"Astrometry server rejected raw upload ({response.status_code}), retrying as PNG")
+                        response = None
+                if response is None:
+                    response = self._post_png(url, upload_image, data)
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+            
+            # Failed solves still mean the server is up; only 5xx counts against it
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
                 
             if response.status_code != 200:
                 raise RuntimeError(f"Astrometry server returned status {response.status_code}: {response.text}")
@@ -56,14 +114,51 @@ class CustomRemotePlateSolver(PlateSolver):
                 return wcs_header
             else:
                 msg = result.get("message", "Unknown error")
-                raise RuntimeError(f"Plate solving failed: {msg}")
+                raise NoSolutionError(f"Plate solving failed: {msg}")
                 
         except RuntimeError:
             raise  # Re-raise our own exceptions
         except Exception as e:
             raise RuntimeError(f"Error during plate solving: {e}") from e
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
+
+    def _timeout(self):
+        return (CONNECT_TIMEOUT, self.config.plate_solving_timeout + READ_TIMEOUT_MARGIN)
+
+    def _post_png(self, url: str, image: PILImage.Image, data: dict) -> requests.Response:
+        """Upload the image as a multipart PNG."""
+        # Encode in memory; the fastest zlib level is worth the slightly
+        # larger upload
+        upload = io.BytesIO()
+        image.save(upload, format='PNG', compress_level=1)
+        upload.seek(0)
+        
+        return self.session.post(
+            url,
+            files={'image': ('image.png', upload, 'image/png')},
+            data=data,
+            timeout=self._timeout()
+        )
+
+    def _post_raw(self, url: str, image: PILImage.Image, data: dict) -> requests.Response:
+        """
+        Upload the 8-bit grayscale pixels as the raw request body.
+        
+        Skips PNG encoding here and decoding on the server. The body is
+        gzipped at the fastest level, which shrinks the mostly dark sky
+        background several times over. The shape and dtype go in headers
+        and the hints in the query string.
+        """
+        pixels = np.asarray(image, dtype=np.uint8)
+        
+        return self.session.post(
+            url,
+            data=gzip.compress(pixels.tobytes(), compresslevel=1),
+            params=data,
+            headers={
+                'Content-Type': 'application/octet-stream',
+                'Content-Encoding': 'gzip',
+                'X-Image-Shape': ','.join(str(dim) for dim in pixels.shape),
+                'X-Image-Dtype': str(pixels.dtype),
+            },
+            timeout=self._timeout()
+        )
@@ -2,6 +2,16 @@ from abc import ABC, abstractmethod
 from typing import Optional
 from PIL import Image as PILImage
 from astropy.io.fits import Header
+from src.tools.capture_sky.types import PlateSolvingHints
+
+
+class NoSolutionError(RuntimeError):
+    """
+    Raised when the solver processed the image but found no solution.
+    
+    Unlike timeouts and connection errors, retrying with other hints may help.
+    """
+
 
 class PlateSolver(ABC):
     """
@@ -9,18 +19,20 @@ class PlateSolver(ABC):
     """
     
     @abstractmethod
-    def solve(self, image: PILImage.Image) -> Header:
+    def solve(self, image: PILImage.Image, hints: Optional[PlateSolvingHints] = None) -> Header:
         """
         Perform plate solving on the given image.
         
         Args:
             image: The image to be solved.
+            hints: Optional pixel scale and center hints to narrow the search.
             
         Returns:
             The WCS header information.
             
         Raises:
-            RuntimeError: If plate solving fails.
+            NoSolutionError: If the solver found no solution for the image.
+            RuntimeError: If plate solving fails otherwise.
         """
         pass
         
@@ -29,3 +41,8 @@ class PlateSolver(ABC):
     def name(self) -> str:
         """Return a human-readable name for this solver."""
         pass
+
+    @property
+    def uses_detected_sources(self) -> bool:
+        """Whether solve() uses hints.detected_sources, so callers should pass the sources they detected."""
+        return False
@@ -0,0 +1,171 @@
+"""
+Caches for SIMBAD lookups.
+
+Provides a thread-safe in-memory LRU cache with a time-to-live and a small
+SQLite-backed disk cache, so identifications survive process restarts.
+Objects are stored as JSON, never pickled.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from src.tools.capture_sky.types import CelestialObject, CelestialPosition
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_simbad_identifier(name: str) -> str:
+    """Normalize an identifier for cache keys, so 'M31', 'm 31' and 'M  31' match."""
+    return _WHITESPACE_RE.sub("", name).upper()
+
+
+class MemoryCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache with a time-to-live.
+
+    Callers decide what to store; SIMBAD lookups only store successful
+    identifications, so failures are retried on the next call.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[K, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def _object_to_json(obj: CelestialObject) -> str:
+    return json.dumps(asdict(obj))
+
+
+def _object_from_json(data: str) -> CelestialObject:
+    fields = json.loads(data)
+    fields["position"] = CelestialPosition(**fields["position"])
+    return CelestialObject(**fields)
+
+
+class SimbadDiskCache:
+    """
+    SQLite-backed cache of SIMBAD objects keyed by a string.
+
+    The cache is best effort: any storage error is logged once and the cache
+    then behaves as empty, so lookups fall through to SIMBAD.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS simbad_objects ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.commit()
+                self._conn = conn
+            except Exception as e:
+                logger.warning(f"SIMBAD disk cache disabled ({self.path}): {e}")
+                self._disabled = True
+        return self._conn
+
+    def get(self, key: str) -> Optional[CelestialObject]:
+        return self.lookup(key)[1]
+
+    def lookup(self, key: str, max_age_seconds: Optional[float] = None) -> Tuple[bool, Optional[CelestialObject]]:
+        """
+        Look up a key, telling cached misses apart from missing entries.
+
+        Returns:
+            Tuple of (found, object). The object is None for a cached miss.
+            Entries older than max_age_seconds count as not found.
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return False, None
+            try:
+                row = conn.execute(
+                    "SELECT value, created_at FROM simbad_objects WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return False, None
+                if max_age_seconds is not None and row[1] < time.time() - max_age_seconds:
+                    return False, None
+                return True, _object_from_json(row[0]) if row[0] != "null" else None
+            except Exception as e:
+                logger.warning(f"SIMBAD disk cache read failed for '{key}': {e}")
+                return False, None
+
+    def put(self, key: str, obj: Optional[CelestialObject]) -> None:
+        """Store an object, or None to remember that nothing was found."""
+        self.put_many([(key, obj)])
+
+    def put_many(self, items: List[Tuple[str, Optional[CelestialObject]]]) -> None:
+        """Store several entries in a single transaction."""
+        if not items:
+            return
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO simbad_objects (key, value, created_at) VALUES (?, ?, ?)",
+                    [(key, _object_to_json(obj) if obj is not None else "null", now) for key, obj in items],
+                )
+                conn.commit()
+            except Exception as e:
+                logger.warning(f"SIMBAD disk cache write failed for {len(items)} entries: {e}")
+
+
+_disk_caches: dict = {}
+_disk_caches_lock = threading.Lock()
+
+
+def get_simbad_disk_cache(storage_dir: str) -> SimbadDiskCache:
+    """Return the shared disk cache stored under the given storage directory."""
+    path = os.path.join(storage_dir, "simbad_cache.sqlite")
+    with _disk_caches_lock:
+        cache = _disk_caches.get(path)
+        if cache is None:
+            cache = _disk_caches[path] = SimbadDiskCache(path)
+        return cache
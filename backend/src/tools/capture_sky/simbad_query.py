@@ -5,13 +5,17 @@ Provides functions to query SIMBAD for objects at specific celestial coordinates
 used to identify detected objects after plate-solving.
 """
 
-from typing import Optional, List, cast
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Callable, Optional, List, Tuple, TypeVar, cast
 from astroquery.simbad import Simbad
 from astropy.coordinates import SkyCoord
 from astropy.table import Table
 import astropy.units as u
 import numpy as np
+import dataclasses
 import logging
+import re
+import threading
 import time
 import random
 
@@ -19,6 +23,9 @@ logger = logging.getLogger(__name__)
 
 from src.config import AppConfig
 from src.tools.capture_sky.types import CelestialPosition, CelestialObject
+from src.tools.capture_sky.bright_objects import find_bright_object
+from src.tools.capture_sky.http_session import set_default_timeout
+from src.tools.capture_sky.simbad_cache import MemoryCache, get_simbad_disk_cache, normalize_simbad_identifier
 
 
 # Object type descriptions for human-readable output
@@ -43,10 +50,153 @@ OTYPE_DESCRIPTIONS = {
 }
 
 
+T = TypeVar("T")
+
+# Retries of a mirror that answers 429/503, with exponential backoff from this base
+THROTTLE_RETRIES = 3
+THROTTLE_BACKOFF_SECONDS = 0.5
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket limiting calls to `rate` per second on average,
+    with bursts of up to `capacity`. Tokens are refilled lazily on acquire.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take a token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# SIMBAD allows about 6 queries per second per client; shared by all threads
+_rate_limiter = _TokenBucket(rate=6, capacity=6)
+
+
+def _is_throttled(error: BaseException) -> bool:
+    """Whether an error, or one it wraps, is an HTTP 429 or 503 response."""
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        response = getattr(current, "response", None)
+        if getattr(response, "status_code", None) in (429, 503):
+            return True
+        # pyvo keeps the underlying requests error in `cause`
+        cause = getattr(current, "cause", None)
+        current = cause if isinstance(cause, BaseException) else (current.__cause__ or current.__context__)
+    return False
+
+
+def _query_with_failover(config: AppConfig, query: Callable[[str], T]) -> T:
+    """
+    Run a SIMBAD query against each configured mirror in turn.
+    
+    Every attempt takes a token from the shared rate limiter. A mirror that
+    answers 429/503 is retried with exponential backoff before moving on.
+    Stalled mirrors are cut off by the HTTP timeout of the clients from
+    _get_simbad, so the query runs on the calling thread.
+    
+    Args:
+        config: Application configuration with the mirror list
+        query: Callable that takes a SIMBAD server name and runs the query against it
+    
+    Returns:
+        The result from the first mirror that answers.
+    
+    Raises:
+        The last error if every mirror fails or times out.
+    """
+    last_error: Exception = RuntimeError("No SIMBAD mirrors configured")
+    
+    for server in config.simbad_mirrors:
+        for attempt in range(THROTTLE_RETRIES + 1):
+            _rate_limiter.acquire()
+            try:
+                return query(server)
+            except Exception as e:
+                last_error = e
+                if attempt == THROTTLE_RETRIES or not _is_throttled(e):
+                    break
+                # Jittered so throttled threads don't retry in lockstep
+                delay = THROTTLE_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(1.0, 1.5)
+                logger.info(f"SIMBAD mirror {server} is throttling, retrying in {delay:.1f}s")
+                time.sleep(delay)
+        logger.warning(f"SIMBAD mirror {server} failed: {last_error}")
+    
+    raise last_error
+
+
+# Fields added to SIMBAD's defaults (main_id, ra, dec and coordinate errors),
+# only those read by _parse_simbad_row
+_OBJECT_FIELDS = (
+    'otype',       # Object type code (e.g., '*', 'G')
+    'V',           # Visual magnitude
+    'B',           # Blue magnitude (for B-V color index)
+    'sp_type',     # Spectral type (e.g., 'G2V')
+    'morph_type',  # Morphological type (for galaxies)
+    'plx_value',   # Parallax (for distance calculation)
+    'galdim_majaxis', # Major axis angular size (arcminutes, renamed from dim_majaxis)
+    'ids'          # All identifiers (to find common name)
+)
+# Fallback for lookups by identifier that fail with the full set
+_ID_MINIMAL_FIELDS = ('otype', 'ids')
+
+_simbad_clients = threading.local()
+
+
+def _get_simbad(server: str, fields: Tuple[str, ...], timeout: float, row_limit: int = -1):
+    """
+    Return this thread's Simbad client for a server and field set.
+    
+    Reusing the client keeps its HTTP session, and with it the open
+    connections to the mirror. add_votable_fields also queries SIMBAD for
+    the field definitions, so it only runs once per client. Clients are
+    never shared between threads, so the row limit is set on every call.
+    
+    astroquery's TAP queries send no HTTP timeout, so the client's session
+    gets `timeout` as its connect/read timeout when it is created.
+    """
+    clients = getattr(_simbad_clients, "clients", None)
+    if clients is None:
+        clients = _simbad_clients.clients = {}
+    
+    client = clients.get((server, fields))
+    if client is None:
+        client = Simbad()
+        set_default_timeout(client._session, timeout)
+        client.server = server
+        client.add_votable_fields(*fields)
+        clients[(server, fields)] = client
+    client.ROW_LIMIT = row_limit
+    return client
+
+
+_id_cache: MemoryCache[str, CelestialObject] = MemoryCache(maxsize=10000, ttl_seconds=24 * 3600)
+
+
 def query_simbad_by_id(name: str, config: AppConfig) -> Optional[CelestialObject]:
     """
     Query SIMBAD for an object by its identifier.
     
+    Found objects are cached in memory and on disk under the normalized
+    identifier, so 'M31' and 'M 31' share an entry. Misses are not cached.
+    
     Args:
         name: Object name (e.g., "M 42", "Betelgeuse")
         config: Application configuration
@@ -54,32 +204,47 @@ def query_simbad_by_id(name: str, config: AppConfig) -> Optional[CelestialObject
     Returns:
         CelestialObject if found, None otherwise.
     """
-    try:
-        # Configure SIMBAD query
-        custom_simbad = Simbad()
-        custom_simbad.add_votable_fields(
-            'otype',       # Object type code
-            'V',           # Visual magnitude
-            'B',           # Blue magnitude
-            'sp_type',     # Spectral type
-            'morph_type',  # Morphological type
-            'plx_value',   # Parallax
-            'galdim_majaxis', # Major axis angular size (renamed from dim_majaxis)
-            'ids',         # All identifiers
-            'ra',          # RA
-            'dec'          # DEC
-        )
-        
+    cached = _cached_object_by_id(name, config)
+    if cached is not None:
+        return cached
+    
+    obj = _query_simbad_by_id_remote(name, config)
+    if obj is not None:
+        key = normalize_simbad_identifier(name)
+        _id_cache.put(key, obj)
+        get_simbad_disk_cache(config.storage_dir).put(key, obj)
+    return obj
+
+
+def _cached_object_by_id(name: str, config: AppConfig) -> Optional[CelestialObject]:
+    """Look an identifier up in the memory and disk caches only."""
+    key = normalize_simbad_identifier(name)
+    cached = _id_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    cached = get_simbad_disk_cache(config.storage_dir).get(key)
+    if cached is not None:
+        _id_cache.put(key, cached)
+    return cached
+
+
+def _query_simbad_by_id_remote(name: str, config: AppConfig) -> Optional[CelestialObject]:
+    """Query SIMBAD by identifier without consulting the caches."""
+    def run_query(server: str) -> Optional[Table]:
         # Query by object name
-        result = cast(Optional[Table], custom_simbad.query_object(name))
+        result = cast(Optional[Table], _get_simbad(server, _OBJECT_FIELDS, config.simbad_mirror_timeout).query_object(name))
         
         if result is None or len(result) == 0:
             # Fallback: Try with minimal fields if the full query failed
             # Some objects (like M42) might not have all the requested fields
             logger.info(f"  Initial SIMBAD query for '{name}' failed. Retrying with minimal fields...")
-            minimal_simbad = Simbad()
-            minimal_simbad.add_votable_fields('otype', 'ra', 'dec', 'ids')
-            result = cast(Optional[Table], minimal_simbad.query_object(name))
+            result = cast(Optional[Table], _get_simbad(server, _ID_MINIMAL_FIELDS, config.simbad_mirror_timeout).query_object(name))
+        
+        return result
+    
+    try:
+        result = _query_with_failover(config, run_query)
         
         if result is None or len(result) == 0:
             return None
@@ -89,14 +254,14 @@ def query_simbad_by_id(name: str, config: AppConfig) -> Optional[CelestialObject
         
         # We don't have a query position/radius, so we use 0.0 placeholders.
         # The parser will use the object's actual coordinates if available.
-        return _parse_simbad_row(row, result.colnames, 0.0, 0.0, 0.0)
+        return _parse_simbad_row(row, frozenset(result.colnames), 0.0, 0.0, 0.0)
         
     except Exception as e:
         logger.error(f"SIMBAD query by ID failed for '{name}': {e}")
         return None
 
 
-def _query_simbad_at_position(ra: float, dec: float, radius_arcsec: float, config: AppConfig, query_id: int) -> Optional[CelestialObject]:
+def _query_simbad_at_position(ra: float, dec: float, radius_arcsec: float, config: AppConfig) -> Optional[CelestialObject]:
     """
     Query SIMBAD for the closest object at a specific position.
     
@@ -108,104 +273,163 @@ def _query_simbad_at_position(ra: float, dec: float, radius_arcsec: float, confi
     
     Returns:
         CelestialObject if found, None otherwise.
+    
+    Raises:
+        The query error if no SIMBAD mirror answered.
     """
-    try:
-        coord = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, frame='icrs')
-        
-        # Configure SIMBAD query with selected fields
-        custom_simbad = Simbad()
-        custom_simbad.add_votable_fields(
-            'otype',       # Object type code (e.g., '*', 'G')
-            'V',           # Visual magnitude
-            'B',           # Blue magnitude (for B-V color index)
-            'sp_type',     # Spectral type (e.g., 'G2V')
-            'morph_type',  # Morphological type (for galaxies)
-            'plx_value',   # Parallax (for distance calculation)
-            'galdim_majaxis', # Major axis angular size (arcminutes, renamed from dim_majaxis)
-            'ids'          # All identifiers (to find common name)
-        )
-        custom_simbad.ROW_LIMIT = 5  # We only need the closest matches
+    coord = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, frame='icrs')
+    
+    # Query with specified radius
+    radius_arcsec = max(
+        radius_arcsec,
+        config.simbad_search_radius_arcsec
+    )
+    
+    def run_query(server: str) -> Optional[Table]:
+        # We only need the closest matches
+        custom_simbad = _get_simbad(server, _OBJECT_FIELDS, config.simbad_mirror_timeout, row_limit=5)
         
-        # Query with specified radius
-        radius_arcsec = max(
-            radius_arcsec,
-            config.simbad_search_radius_arcsec
-        )
-
-        result = cast(Optional[Table], custom_simbad.query_region(
+        return cast(Optional[Table], custom_simbad.query_region(
             coord, 
             radius=radius_arcsec * u.arcsec
         ))
-        
-        if result is None or len(result) == 0:
-            return None
-        
-        # Find the closest object
-        closest_row = None
-        min_distance = float('inf')
-        
-        for row in result:
-            try:
-                # Get object coordinates
-                if 'ra' in result.colnames and 'dec' in result.colnames:
-                    ra_val, dec_val = row['ra'], row['dec']
-                    if not np.ma.is_masked(ra_val) and not np.ma.is_masked(dec_val):
-                        try:
-                            obj_ra, obj_dec = float(ra_val), float(dec_val) # type: ignore
-                        except (ValueError, TypeError):
-                            # Try parsing as sexagesimal
-                            try:
-                                c = SkyCoord(str(ra_val), str(dec_val), unit=(u.hourangle, u.deg))
-                                obj_ra, obj_dec = c.ra.deg, c.dec.deg # type: ignore
-                            except:
-                                continue
-                        
-                        # Calculate angular distance
-                        obj_coord = SkyCoord(ra=obj_ra * u.deg, dec=obj_dec * u.deg, frame='icrs')
-                        sep = coord.separation(obj_coord).arcsec
-                        
-                        if sep < min_distance: # type: ignore
-                            min_distance = sep
-                            closest_row = row
-            except Exception:
-                continue
-        
-        if closest_row is None:
-            return None
-        
-        # Parse the closest object
-        return _parse_simbad_row(closest_row, result.colnames, ra, dec, radius_arcsec)
-        
-    except Exception as e:
-        # Query failed - return None silently
+
+    result = _query_with_failover(config, run_query)
+    
+    if result is None or len(result) == 0:
+        return None
+    
+    # Find the closest object
+    row_ra = _column_degrees(result, 'ra')
+    row_dec = _column_degrees(result, 'dec')
+    separations = _angular_separation_arcsec(ra, dec, row_ra, row_dec)
+    if np.all(np.isnan(separations)):
         return None
+    closest_row = result[int(np.nanargmin(separations))]
+    
+    # Parse the closest object
+    return _parse_simbad_row(closest_row, frozenset(result.colnames), ra, dec, radius_arcsec)
+
+
+def _column_degrees(result: Table, name: str) -> np.ndarray:
+    """Return a coordinate column as float degrees, with NaN for masked values."""
+    if name not in result.colnames:
+        return np.full(len(result), np.nan)
+    column = np.ma.asarray(result[name])
+    return np.ma.filled(column.astype(np.float64), np.nan)
+
+
+def _angular_separation_arcsec(ra: float, dec: float, ra_arr: np.ndarray, dec_arr: np.ndarray) -> np.ndarray:
+    """Haversine separation in arcseconds between one position and arrays of positions, all in degrees."""
+    ra1, dec1 = np.radians(ra), np.radians(dec)
+    ra2, dec2 = np.radians(ra_arr), np.radians(dec_arr)
+    a = np.sin((dec2 - dec1) / 2) ** 2 + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))) * 3600.0
+
+
+# Most positions sent in one region query, to stay under SIMBAD's query size limit
+REGION_BATCH_SIZE = 500
+
+
+def _query_simbad_region_batch(positions: List[CelestialPosition], config: AppConfig) -> List[Optional[CelestialObject]]:
+    """
+    Query SIMBAD for all positions with vectorized region queries.
+    
+    Positions are sent in chunks of REGION_BATCH_SIZE, one query per chunk.
+    Every returned row is matched back to the closest query position within
+    that position's search radius.
+    
+    Args:
+        positions: List of CelestialPosition with ra, dec, and radius_arcsec
+        config: Application configuration
+    
+    Returns:
+        List of CelestialObject, one per position (None if no match)
+    """
+    results: List[Optional[CelestialObject]] = []
+    for start in range(0, len(positions), REGION_BATCH_SIZE):
+        results.extend(_query_simbad_region(positions[start:start + REGION_BATCH_SIZE], config))
+    return results
 
 
-def _parse_simbad_row(row, colnames: List[str], query_ra: float, query_dec: float, query_radius_arcsec: float) -> CelestialObject:
+def _query_simbad_region(positions: List[CelestialPosition], config: AppConfig) -> List[Optional[CelestialObject]]:
+    """Query SIMBAD for a chunk of positions with a single region query."""
+    radii = np.array([
+        max(pos.radius_arcsec, config.simbad_search_radius_arcsec) for pos in positions
+    ])
+    coords = SkyCoord(
+        ra=[pos.ra for pos in positions] * u.deg,
+        dec=[pos.dec for pos in positions] * u.deg,
+        frame='icrs'
+    )
+    
+    def run_query(server: str) -> Optional[Table]:
+        # Rows are shared by all positions, don't truncate
+        custom_simbad = _get_simbad(server, _OBJECT_FIELDS, config.simbad_mirror_timeout, row_limit=-1)
+        
+        # One cone per position with its own radius, so the rows are the
+        # same ones the per-position queries would return
+        return cast(Optional[Table], custom_simbad.query_region(coords, radius=radii * u.arcsec))
+    
+    result = _query_with_failover(config, run_query)
+    
+    if result is None or len(result) == 0:
+        return [None] * len(positions)
+    
+    row_ra = _column_degrees(result, 'ra')
+    row_dec = _column_degrees(result, 'dec')
+    valid_rows = np.flatnonzero(~np.isnan(row_ra) & ~np.isnan(row_dec))
+    if len(valid_rows) == 0:
+        return [None] * len(positions)
+    
+    row_coords = SkyCoord(ra=row_ra[valid_rows] * u.deg, dec=row_dec[valid_rows] * u.deg, frame='icrs')
+    
+    # Closest row for every position in one KD-tree query, kept only
+    # within that position's own radius
+    closest, separations, _ = coords.match_to_catalog_sky(row_coords)
+    separations = separations.arcsec
+    
+    # Columns are checked for every parsed row, so build the set once
+    colnames = frozenset(result.colnames)
+    results: List[Optional[CelestialObject]] = []
+    for pos, row_idx, separation, radius_arcsec in zip(positions, closest, separations, radii):
+        if separation > radius_arcsec:
+            results.append(None)
+            continue
+        row = result[valid_rows[row_idx]]
+        results.append(_parse_simbad_row(row, colnames, pos.ra, pos.dec, float(radius_arcsec)))
+    
+    return results
+
+
+_MESSIER_SPACING_RE = re.compile(r'^M\s+')
+
+
+def _parse_simbad_row(row, colnames: AbstractSet[str], query_ra: float, query_dec: float, query_radius_arcsec: float) -> CelestialObject:
     """
     Parse a SIMBAD result row into a CelestialObject.
+    
+    colnames is the set of the result's column names, built once per table.
     """
     # Get main identifier
     main_id = str(row['main_id']).strip()
     name = main_id
 
-    # Try to find a common name (NAME identifier) from the IDs list
+    # IDs are pipe-separated; split them once for the name and alternative names
+    ids_list: List[str] = []
     if 'ids' in colnames and not np.ma.is_masked(row['ids']):
-        # IDs are pipe-separated
-        ids_list = str(row['ids']).split('|')
-        for id_str in ids_list:
-            id_str = id_str.strip()
-            # Look for IDs starting with "NAME "
-            if id_str.startswith('NAME '):
-                # Use the name part (strip "NAME " prefix)
-                name = id_str[5:].strip()
-                break
-    
-    # Clean up name formatting (only if still using main_id or if needed)
-    if name.startswith('M  '):
-        name = 'M' + name[3:].strip()
-    elif name.startswith('M '):
-        name = 'M' + name[2:].strip()
+        ids_list = [id_str.strip() for id_str in str(row['ids']).split('|')]
+    
+    # Try to find a common name (NAME identifier) from the IDs list
+    for id_str in ids_list:
+        # Look for IDs starting with "NAME "
+        if id_str.startswith('NAME '):
+            # Use the name part (strip "NAME " prefix)
+            name = id_str[5:].strip()
+            break
+    
+    # Clean up name formatting ('M  31' -> 'M31')
+    name = _MESSIER_SPACING_RE.sub('M', name)
     
     # Get coordinates
     obj_ra, obj_dec = None, None
@@ -265,10 +489,7 @@ def _parse_simbad_row(row, colnames: List[str], query_ra: float, query_dec: floa
         morph_type = str(row['morph_type']).strip()
     
     # Get alternative names
-    alt_names = []
-    if 'ids' in colnames and not np.ma.is_masked(row['ids']):
-        alt_names = [n.strip() for n in str(row['ids']).split('|') 
-                     if n.strip() and n.strip() != name][:10]
+    alt_names = [n for n in ids_list if n and n != name][:10]
     
     # Get object angular size (galdim_majaxis is in arcminutes, convert to arcseconds)
     object_radius_arcsec = None
@@ -311,50 +532,157 @@ def _parse_simbad_row(row, colnames: List[str], query_ra: float, query_dec: floa
     )
 
 
-def _worker_query_task(idx: int, pos: CelestialPosition, config: AppConfig) -> tuple[int, Optional[CelestialObject]]:
+_position_cache: MemoryCache[Tuple[float, float, float], CelestialObject] = MemoryCache(maxsize=256, ttl_seconds=3600)
+
+# Position lookups, including misses, are reused from disk for this long
+POSITION_DISK_CACHE_TTL = 30 * 24 * 3600
+
+
+def _position_cache_key(pos: CelestialPosition, config: AppConfig) -> Tuple[float, float, float]:
+    """Quantize a position to ~0.4 arcsec so repeated captures of the same field hit the cache."""
+    radius_arcsec = max(pos.radius_arcsec, config.simbad_search_radius_arcsec)
+    return (round(pos.ra, 4), round(pos.dec, 4), round(radius_arcsec, 1))
+
+
+def _position_disk_key(key: Tuple[float, float, float]) -> str:
+    return "pos:{:.4f},{:.4f},{:.1f}".format(*key)
+
+
+# Height of the declination zones used to order positions spatially
+SPATIAL_ZONE_DEG = 1.0
+
+
+def _spatial_order(positions: List[CelestialPosition]) -> np.ndarray:
+    """Indices that sort positions by declination zone, then by RA within each zone."""
+    ra = np.array([pos.ra for pos in positions])
+    dec = np.array([pos.dec for pos in positions])
+    return np.lexsort((ra, np.floor(dec / SPATIAL_ZONE_DEG)))
+
+
+def _cached_bright_object(pos: CelestialPosition, radius_arcsec: float, config: AppConfig) -> Optional[CelestialObject]:
     """
-    Worker function for parallel SIMBAD queries.
-    Must be at module level for ProcessPoolExecutor pickling.
+    Match a position against the curated bright-object catalog and return
+    the object if it has already been looked up by name. Never queries SIMBAD.
     """
-    query_id = idx + 1
-    
-    result = _query_simbad_at_position(pos.ra, pos.dec, pos.radius_arcsec, config, query_id)
-    return idx, result
+    name = find_bright_object(pos.ra, pos.dec, radius_arcsec)
+    if name is None:
+        return None
+    obj = _cached_object_by_id(name, config)
+    if obj is None or obj.position.radius_arcsec:
+        return obj
+    # Lookups by name have no query radius; fall back to the position's, as position queries do
+    return dataclasses.replace(obj, position=dataclasses.replace(obj.position, radius_arcsec=radius_arcsec))
+
 
 def query_simbad_batch(
     config: AppConfig,
     positions: List[CelestialPosition],
-    max_workers: int = 10,
+    max_workers: int = 6,
     show_progress: bool = True,
+    batch_simbad: bool = True,
 ) -> List[Optional[CelestialObject]]:
     """
-    Query SIMBAD for multiple positions in parallel.
+    Query SIMBAD for multiple positions.
+    
+    Positions identified in the last hour are served from memory, and
+    positions looked up in the last 30 days (including ones with no match)
+    from the disk cache. Positions on a well-known bright object already
+    looked up by name are served from the name cache. The rest are sent in
+    batched region queries by default. If that fails, or batching is
+    disabled, they are queried one by one in parallel.
     
     Args:
         positions: List of CelestialPosition with ra, dec, and radius_arcsec
         max_workers: Maximum number of parallel queries
         show_progress: Whether to show tqdm progress bar
+        batch_simbad: Whether to query all positions in a single request
         config: Application configuration
     
     Returns:
         List of CelestialObject, one per position (None if no match)
     """
-    from concurrent.futures import ProcessPoolExecutor, as_completed
-    from tqdm import tqdm
-    
     if not positions:
         return []
     
+    keys = [_position_cache_key(pos, config) for pos in positions]
+    results: List[Optional[CelestialObject]] = [_position_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    
+    if missing:
+        disk_cache = get_simbad_disk_cache(config.storage_dir)
+        remote = []
+        for i in missing:
+            found, result = disk_cache.lookup(_position_disk_key(keys[i]), POSITION_DISK_CACHE_TTL)
+            if not found:
+                result = _cached_bright_object(positions[i], keys[i][2], config)
+                if result is None:
+                    remote.append(i)
+                    continue
+            if result is not None:
+                results[i] = result
+                _position_cache.put(keys[i], result)
+        missing = remote
+    
+    if missing:
+        # Send nearby positions together: region chunks stay compact and
+        # consecutive queries hit the same part of SIMBAD's sky index
+        missing = [missing[k] for k in _spatial_order([positions[i] for i in missing])]
+        fetched, answered = _query_simbad_positions(
+            config,
+            [positions[i] for i in missing],
+            max_workers=max_workers,
+            show_progress=show_progress,
+            batch_simbad=batch_simbad,
+        )
+        for i, result in zip(missing, fetched):
+            results[i] = result
+            if result is not None:
+                _position_cache.put(keys[i], result)
+        # Failed queries are left out so they are retried next time
+        disk_cache.put_many([
+            (_position_disk_key(keys[i]), result)
+            for i, result, ok in zip(missing, fetched, answered) if ok
+        ])
+    
+    return results
+
+
+def _query_simbad_positions(
+    config: AppConfig,
+    positions: List[CelestialPosition],
+    max_workers: int,
+    show_progress: bool,
+    batch_simbad: bool,
+) -> Tuple[List[Optional[CelestialObject]], List[bool]]:
+    """
+    Query SIMBAD for positions without consulting the caches.
+    
+    Returns:
+        Tuple of (results, answered), where answered tells whether SIMBAD
+        answered for each position, so a None result is a real miss.
+    """
+    from concurrent.futures import as_completed
+    from tqdm import tqdm
+    
+    if batch_simbad:
+        try:
+            return _query_simbad_region_batch(positions, config), [True] * len(positions)
+        except Exception as e:
+            logger.warning(f"Batched SIMBAD query failed: {e}. Falling back to per-position queries.")
+    
     # Create a mapping from index to position for ordered results
     results: List[Optional[CelestialObject]] = [None] * len(positions)
+    answered = [False] * len(positions)
     
-    # Cap workers to 6 to respect SIMBAD rate limits (6 queries/sec)
+    # Cap workers to 6 to match SIMBAD rate limits (6 queries/sec); the
+    # shared rate limiter also covers concurrent batches
     actual_workers = min(max_workers, 6)
     
-    # Run queries in parallel using ProcessPoolExecutor to bypass GIL
-    with ProcessPoolExecutor(max_workers=actual_workers) as executor:
+    # Queries only wait on the network, so threads are enough; worker
+    # processes would each pay for startup and the astroquery import
+    with ThreadPoolExecutor(max_workers=actual_workers, thread_name_prefix="simbad-query") as executor:
         futures = {
-            executor.submit(_worker_query_task, i, pos, config): i 
+            executor.submit(_query_simbad_at_position, pos.ra, pos.dec, pos.radius_arcsec, config): i
             for i, pos in enumerate(positions)
         }
         
@@ -370,10 +698,11 @@ def query_simbad_batch(
         
         for future in iterator:
             try:
-                idx, result = future.result()
-                results[idx] = result
+                idx = futures[future]
+                results[idx] = future.result()
+                answered[idx] = True
             except Exception as e:
                 logger.error(f"SIMBAD query failed: {e}")
                 pass  # Keep None for failed queries
     
-    return results
+    return results, answered
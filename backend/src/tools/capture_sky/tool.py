@@ -12,16 +12,20 @@ false negatives compared to region-based catalog queries.
 
 
 import base64
+import dataclasses
 from datetime import datetime
+import functools
 import io
 import os
 import tempfile
-import json
-import pickle
 import cv2
 import hashlib
-from typing import List, Optional, Tuple
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, cast
 
+import numpy as np
+import orjson
 import requests
 from astropy.io.fits import Header
 from astropy.wcs import WCS
@@ -29,11 +33,47 @@ from PIL import Image as PILImage, ImageDraw, ImageFont
 
 from src.config import get_config_from_env
 from src.utils import ra_to_hms, dec_to_dms
-from src.tools.capture_sky.types import DetectedObject, CelestialObject, CelestialPosition
+from src.tools.capture_sky.types import DetectedObject, CelestialObject, CelestialPosition, PlateSolvingHints
 from src.tools.capture_sky.object_detector.contrast_detector import ContrastObjectDetector
 from src.tools.capture_sky.simbad_query import query_simbad_batch
 from src.tools.capture_sky.plate_solver.custom_remote_solver import CustomRemotePlateSolver
 from src.tools.capture_sky.plate_solver.astrometry_net_solver import AstrometryNetPlateSolver
+from src.tools.capture_sky.plate_solver.plate_solver_interface import NoSolutionError
+
+
+# Runs object detection alongside plate solving
+_detection_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="detection")
+
+
+_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_font(size: int):
+    """Load the first available annotation font at a size, once per process."""
+    for path in _FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=8)
+def _wcs_from_header_text(header_text: str) -> WCS:
+    """
+    Build the WCS for a solved header, once per distinct header.
+    
+    Cached WCS objects are shared between threads, so the lazy wcsset()
+    initialization is done up front and never happens concurrently.
+    """
+    # Solver output is standard FITS WCS, so skip astropy's header fix-ups
+    wcs = WCS(Header.fromstring(header_text), fix=False)
+    wcs.wcs.set()
+    return wcs
 
 
 class SkyCaptureTool:
@@ -86,24 +126,32 @@ class SkyCaptureTool:
     # Plate solving and object identification
     # =============================================================================
 
-    def _plate_solve(self, image: PILImage.Image):
+    def _plate_solve(self, image: PILImage.Image, hints: Optional[PlateSolvingHints] = None):
         """
         Perform plate solving on an image using Astrometry.net.
         
+        Args:
+            image: Image to solve
+            hints: Optional pixel scale and center hints forwarded to the solver.
+                With hints.retry_without_scale, a solve that finds no solution
+                is retried once without the pixel scale.
+        
         Returns:
             WCS header
             
         Raises:
             RuntimeError: If plate solving fails
         """
-        cache_path = os.path.join(self.config.storage_dir, "logs", "wcs.pkl")
+        # The header is cached as FITS header text, which parses faster than
+        # unpickling a Header and matches the WCS cache key
+        cache_path = os.path.join(self.config.storage_dir, "logs", "wcs.txt")
         
         # Try to load from cache if enabled
         if self.config.plate_solving_use_cache and os.path.exists(cache_path):
             try:
                 self.log(f"Loading WCS from cache: {cache_path}")
-                with open(cache_path, "rb") as f:
-                    wcs_header = pickle.load(f)
+                with open(cache_path, "r", encoding="ascii") as f:
+                    wcs_header = Header.fromstring(f.read())
                 self.log("Successfully loaded WCS from cache")
                 return wcs_header
             except Exception as e:
@@ -112,13 +160,32 @@ class SkyCaptureTool:
         # Perform plate solving
         try:
             self.log(f"Solving plate using {self.plate_solver.name}...")
-            wcs_header = self.plate_solver.solve(image)
+            
+            try:
+                wcs_header = self.plate_solver.solve(image, hints=hints)
+            except NoSolutionError as e:
+                # Timeouts and connection errors are not retried, only a wrong
+                # scale guess (e.g. the setup changed since the last capture)
+                if hints is None or not hints.retry_without_scale or hints.pixel_scale_arcsec is None:
+                    raise
+                self.log(f"No solution with pixel scale {hints.pixel_scale_arcsec} ({e}), retrying without it")
+                wcs_header = self.plate_solver.solve(
+                    image, hints=dataclasses.replace(hints, pixel_scale_arcsec=None, retry_without_scale=False)
+                )
                 
-            # Save to cache
+            # Save to cache. Written to a temporary file and renamed, so
+            # concurrent captures never read a partial header.
             try:
                 os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-                with open(cache_path, "wb") as f:
-                    pickle.dump(wcs_header, f)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="ascii") as f:
+                        f.write(wcs_header.tostring())
+                    os.replace(tmp_path, cache_path)
+                except BaseException:
+                    # Don't leave the partial file behind
+                    os.unlink(tmp_path)
+                    raise
                 self.log(f"Saved WCS to cache: {cache_path}")
             except Exception as e:
                 self.log(f"Failed to save WCS to cache: {e}")
@@ -140,42 +207,59 @@ class SkyCaptureTool:
         return None
 
 
-    def _identify_objects(self, detected_objects: List[DetectedObject], wcs_header) -> List[Optional[CelestialObject]]:
+    def _identify_objects(
+        self,
+        detected_objects: List[DetectedObject],
+        wcs_header,
+        pixel_scale_arcsec: Optional[float] = None
+    ) -> List[Optional[CelestialObject]]:
         """
         Identify objects in the image via SIMBAD.
         
+        Args:
+            detected_objects: Detections to identify
+            wcs_header: WCS header from plate solving
+            pixel_scale_arcsec: Pixel scale already read from wcs_header, if
+                the caller has it; otherwise it is read here
+        
         Returns:
             List of identified CelestialObject instances
         """
-        wcs = WCS(wcs_header)
-        pixel_scale = self._get_pixel_scale_arcsec(wcs_header) or 1.0
+        wcs = _wcs_from_header_text(wcs_header.tostring())
+        if pixel_scale_arcsec is None:
+            pixel_scale_arcsec = self._get_pixel_scale_arcsec(wcs_header)
+        pixel_scale = pixel_scale_arcsec or 1.0
         
         # Step 1: Convert to celestial coordinates
 
         self.log(f"Converting {len(detected_objects)} positions to celestial coordinates...")
-        celestial_positions = []
+        count = len(detected_objects)
+        xs = np.fromiter((obj.position.pixel_x for obj in detected_objects), dtype=np.float64, count=count)
+        ys = np.fromiter((obj.position.pixel_y for obj in detected_objects), dtype=np.float64, count=count)
+        radii_arcsec = np.fromiter((obj.position.radius_px for obj in detected_objects), dtype=np.float64, count=count) * pixel_scale
         
-        for detected_object in detected_objects:
-            try:
-                sky = wcs.pixel_to_world(detected_object.position.pixel_x, detected_object.position.pixel_y)
-                celestial_positions.append(
-                    CelestialPosition(ra=sky.ra.deg, dec=sky.dec.deg, radius_arcsec=detected_object.position.radius_px * pixel_scale) # type: ignore
-                )
-            except Exception as e:
-                raise RuntimeError(
-                    f"Failed to convert pixel position ({detected_object.position.pixel_x}, {detected_object.position.pixel_y}) "
-                    f"to celestial coordinates: {e}"
-                ) from e
+        # One call for all positions. all_pix2world applies the same distortion
+        # corrections as pixel_to_world, with 0-based pixels.
+        try:
+            ras, decs = wcs.all_pix2world(xs, ys, 0)
+        except Exception as e:
+            raise RuntimeError(f"Failed to convert {count} pixel positions to celestial coordinates: {e}") from e
         
-        # Step 3: Query SIMBAD in parallel for all positions
+        celestial_positions = [
+            CelestialPosition(ra=float(ra), dec=float(dec), radius_arcsec=float(radius))
+            for ra, dec, radius in zip(ras, decs, radii_arcsec)
+        ]
+        
+        # Step 3: Query SIMBAD for all positions
 
-        self.log(f"Querying SIMBAD for {len(celestial_positions)} positions in parallel...")
+        self.log(f"Querying SIMBAD for {len(celestial_positions)} positions...")
         
         identified_objects = query_simbad_batch(
             self.config,
             celestial_positions, 
-            max_workers=10,
+            max_workers=self.config.simbad_max_workers,
             show_progress=True,
+            batch_simbad=self.config.simbad_batch_query,
         )
         
         self.log(f"Identified {len(identified_objects)} objects")
@@ -191,20 +275,11 @@ class SkyCaptureTool:
         """
         Annotate the image with identified and unidentified objects.
         """
-        img = image.convert('RGB').copy()
+        # convert() already returns a new image; only copy when there is nothing to convert
+        img = image.copy() if image.mode == 'RGB' else image.convert('RGB')
         draw = ImageDraw.Draw(img)
         
-        # Try to load fonts
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-            font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 10)
-        except:
-            try:
-                font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-                font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 10)
-            except:
-                font = ImageFont.load_default()
-                font_small = font
+        font_small = _load_font(10)
         
         img_width, img_height = img.size
         
@@ -218,17 +293,21 @@ class SkyCaptureTool:
             'unidentified': (128, 128, 128)
         }
         
+        # Select identified objects inside the frame up front, so the loop only draws
+        count = len(detected_objects)
+        xs = np.fromiter((obj.position.pixel_x for obj in detected_objects), dtype=np.float64, count=count)
+        ys = np.fromiter((obj.position.pixel_y for obj in detected_objects), dtype=np.float64, count=count)
+        identified = np.fromiter((obj is not None for obj in celestial_objects), dtype=bool, count=count)
+        drawable = identified & (xs >= 0) & (xs < img_width) & (ys >= 0) & (ys < img_height)
+        
         # Draw identified objects
-        for (detected_object, identified_object) in zip(detected_objects, celestial_objects):
-            if identified_object is None:
-                continue
+        for i in np.flatnonzero(drawable):
+            detected_object = detected_objects[i]
+            identified_object = cast(CelestialObject, celestial_objects[i])
 
             try:
                 x, y = detected_object.position.pixel_x, detected_object.position.pixel_y
                 
-                if not (0 <= x < img_width and 0 <= y < img_height):
-                    continue
-                
                 color = colors.get(identified_object.catalog, colors['default'])
                 
                 radius = 15
@@ -260,14 +339,15 @@ class SkyCaptureTool:
     # Main function
     # =============================================================================
 
-    def capture_sky_from_file(self, image_path: str) -> dict:
+    def capture_sky_from_file(self, image_path: str, hints: Optional[PlateSolvingHints] = None) -> dict:
         """
         Analyze a night sky image from a file path.
         
-        Convenience method that reads the file and calls capture_sky with base64 encoding.
+        Convenience method that reads the file and calls capture_sky_from_bytes.
         
         Args:
             image_path: Path to the image file
+            hints: Optional plate solving hints
         
         Returns:
             Same as capture_sky()
@@ -275,12 +355,35 @@ class SkyCaptureTool:
         try:
             with open(image_path, "rb") as f:
                 image_data = f.read()
-            base64_image = base64.b64encode(image_data).decode("utf-8")
-            return self.capture_sky(base64_image)
         except Exception as e:
             raise RuntimeError(f"Failed to read image from {image_path}: {e}")
+        
+        return self.capture_sky_from_bytes(image_data, hints=hints)
 
-    def capture_sky(self, base64_image: str) -> dict:
+    def capture_sky(self, base64_image: str, hints: Optional[PlateSolvingHints] = None) -> dict:
+        """
+        Analyze a base64-encoded night sky image.
+        
+        Args:
+            base64_image: Base64-encoded image string
+            hints: Optional plate solving hints
+        
+        Returns:
+            Same as capture_sky_from_bytes()
+        """
+        try:
+            image_data = base64.b64decode(base64_image)
+        except Exception as e:
+            raise RuntimeError(f"Failed to decode base64 image: {e}")
+        
+        return self.capture_sky_from_bytes(image_data, hints=hints)
+
+    def capture_sky_from_bytes(
+        self,
+        image_data: bytes,
+        hints: Optional[PlateSolvingHints] = None,
+        image: Optional[PILImage.Image] = None
+    ) -> dict:
         """
         Analyze a night sky image using detection-first approach.
         
@@ -289,13 +392,17 @@ class SkyCaptureTool:
         (annotations for invisible objects) and false negatives (missing visible objects).
         
         Args:
-            base64_image: Base64-encoded image string
+            image_data: Encoded image bytes (JPEG, PNG, ...)
+            hints: Optional pixel scale and center hints to speed up plate solving
+            image: Optional already decoded (and loaded) image of image_data, so
+                callers that also need the pixels decode it only once
         
         Returns:
             dict with:
             - success: bool
             - plate_solving: dict with center coordinates and pixel scale
             - identified_objects: List of identified celestial objects with pixel coords
+            - annotated_image_bytes / annotated_image_mime: Encoded annotated image, if available
         """
 
         # Step 0: Prepare logs dir with datetime string
@@ -304,14 +411,17 @@ class SkyCaptureTool:
         logs_dir = os.path.join(self.config.storage_dir, "logs", datetime_str)
         os.makedirs(logs_dir, exist_ok=True)
  
-        # Step 1: Decode base64 image
-        self.log(f"\n> Step 1: Decoding base64 image...")
+        # Step 1: Decode image
+        self.log(f"\n> Step 1: Decoding image...")
 
-        try:
-            image_data = base64.b64decode(base64_image)
-            image = PILImage.open(io.BytesIO(image_data))
-        except Exception as e:
-            raise RuntimeError(f"Failed to decode base64 image: {e}")
+        if image is None:
+            try:
+                image = PILImage.open(io.BytesIO(image_data))
+                # Decode now: detection and plate solving read the pixels from
+                # two threads, and PIL's lazy decoding is not thread-safe
+                image.load()
+            except Exception as e:
+                raise RuntimeError(f"Failed to decode image: {e}")
             
         # Check cache if in test mode
         if self.config.test_mode:
@@ -322,8 +432,8 @@ class SkyCaptureTool:
             cache_path = os.path.join(os.path.dirname(__file__), "analysis_cache.json")
             if os.path.exists(cache_path):
                 try:
-                    with open(cache_path, "r") as f:
-                        cache = json.load(f)
+                    with open(cache_path, "rb") as f:
+                        cache = orjson.loads(f.read())
                     
                     if md5_hash in cache:
                         self.log("  Cache hit! Returning cached results.")
@@ -343,15 +453,33 @@ class SkyCaptureTool:
             else:
                 self.log(f"  Cache file not found at {cache_path}")
         
-        captured_image = image.copy()
-        captured_debug_path = os.path.join(logs_dir, "captured.png")
-        captured_image.save(captured_debug_path)
+        # Keep the input as received; the annotated image already carries the
+        # same pixels, so re-encoding it here would only cost CPU
+        captured_ext = (image.format or "png").lower()
+        captured_debug_path = os.path.join(logs_dir, f"captured.{captured_ext}")
+        with open(captured_debug_path, "wb") as f:
+            f.write(image_data)
         
         # Step 2: Plate solve
 
+        # Step 3 (object detection) doesn't depend on the WCS, so it runs
+        # while the plate solver waits on the network
+
+        if self.config.object_detector == "contrast_detector":
+            object_detector = ContrastObjectDetector()
+        else:
+            raise ValueError(f"Invalid object detector specified: '{self.config.object_detector}'. Supported: 'contrast_detector'")
+
+        detection = _detection_executor.submit(object_detector.detect, image)
+
         self.log("\n> Step 2: Plate solving...")
 
-        wcs_header = self._plate_solve(image)
+        if self.plate_solver.uses_detected_sources:
+            # The solver submits the brightest detections instead of the
+            # image, so it gets this detection rather than running its own
+            hints = dataclasses.replace(hints or PlateSolvingHints(), detected_sources=detection.result())
+
+        wcs_header = self._plate_solve(image, hints=hints)
         
         if 'CRVAL1' not in wcs_header or 'CRVAL2' not in wcs_header:
             raise Exception("Could not extract center coordinates from WCS header.")
@@ -366,25 +494,20 @@ class SkyCaptureTool:
 
         self.log("\n> Step 3: Detecting objects...")
 
-        if self.config.object_detector == "contrast_detector":
-            object_detector = ContrastObjectDetector()
-        else:
-            raise ValueError(f"Invalid object detector specified: '{self.config.object_detector}'. Supported: 'contrast_detector'")
-
-        detected_objects = object_detector.detect(image)
+        detected_objects = detection.result()
         self.log(f"  Found {len(detected_objects)} objects in image using {self.config.object_detector}")
 
         # Always work on the brightest objects first (top N)
         max_query_objects = self.config.max_query_objects
         if len(detected_objects) > max_query_objects:
-            detected_objects = sorted(detected_objects, key=lambda obj: obj.brightness, reverse=True)[:max_query_objects]
+            detected_objects = heapq.nlargest(max_query_objects, detected_objects, key=lambda obj: obj.brightness)
             self.log(f"  Limiting to top {max_query_objects} brightest detections")
 
         # Step 4: Identify objects
 
         self.log("\n> Step 4: Identifying objects...")
 
-        celestial_objects = self._identify_objects(detected_objects, wcs_header)
+        celestial_objects = self._identify_objects(detected_objects, wcs_header, pixel_scale_arcsec)
         
         # Step 5: Annotate image
 
@@ -392,9 +515,17 @@ class SkyCaptureTool:
 
         annotated_image = self._annotate_image(image, detected_objects, celestial_objects)
 
+        annotated_bytes = None
         try:
-            annotated_path = os.path.join(logs_dir, "annotated.png")
-            annotated_image.save(annotated_path)
+            # JPEG keeps the artifact small and cheap to encode; labels stay
+            # legible at this quality. Encode once and reuse the bytes for
+            # both the log file and the caller.
+            buffer = io.BytesIO()
+            annotated_image.save(buffer, format="JPEG", quality=85)
+            annotated_bytes = buffer.getvalue()
+            annotated_path = os.path.join(logs_dir, "annotated.jpg")
+            with open(annotated_path, "wb") as f:
+                f.write(annotated_bytes)
         except Exception as e:
             self.log(f"Failed to save annotated image: {e}")
 
@@ -453,11 +584,27 @@ class SkyCaptureTool:
         
         try:
             json_path = os.path.join(logs_dir, "analysis.json")
-            with open(json_path, "w") as f:
-                json.dump(result, f, indent=2)
+            with open(json_path, "wb") as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         except Exception as e:
             raise RuntimeError(f"Failed to save JSON: {e}") from e
 
+        # Encoded annotated image, kept out of analysis.json
+        if annotated_bytes is not None:
+            result["annotated_image_bytes"] = annotated_bytes
+            result["annotated_image_mime"] = "image/jpeg"
+
         self.log("\nProcessing completed successfully.")
         
         return result
+
+
+@functools.lru_cache(maxsize=1)
+def get_sky_capture_tool() -> SkyCaptureTool:
+    """
+    Return the shared SkyCaptureTool instance.
+
+    The tool holds no per-request state, so a single instance keeps the plate
+    solver client and its HTTP connections alive across captures.
+    """
+    return SkyCaptureTool()
@@ -2,7 +2,7 @@ from dataclasses import dataclass, asdict
 from typing import Optional, List, Dict, Any
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ImagePosition:
     """Represents a position in image coordinates (pixels) with size (pixels)."""
     pixel_x: float
@@ -10,7 +10,7 @@ class ImagePosition:
     radius_px: float
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DetectedObject:
     """
     Represents a celestial object detected in an image.
@@ -28,7 +28,7 @@ class DetectedObject:
     is_point_source: bool = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CelestialPosition:
     """Represents a position in celestial coordinates (degrees) with size (arcseconds)."""
     ra: float
@@ -36,6 +36,35 @@ class CelestialPosition:
     radius_arcsec: float
 
 @dataclass
+class PlateSolvingHints:
+    """
+    Optional hints that narrow the plate-solving search.
+    
+    Attributes:
+        pixel_scale_arcsec: Approximate image scale in arcseconds per pixel
+        scale_error_percent: Allowed error on the pixel scale, in percent
+        center_ra: Approximate RA of the image center in degrees
+        center_dec: Approximate DEC of the image center in degrees
+        search_radius_deg: Search radius around the center in degrees
+        retry_without_scale: Retry without the pixel scale if no solution is
+            found, for scales that are only a guess (e.g. from an earlier capture)
+        detected_sources: Objects already detected in the image, brightest
+            first, for solvers that submit a source list instead of the image
+    """
+    pixel_scale_arcsec: Optional[float] = None
+    scale_error_percent: float = 10.0
+    center_ra: Optional[float] = None
+    center_dec: Optional[float] = None
+    search_radius_deg: float = 5.0
+    retry_without_scale: bool = False
+    detected_sources: Optional[List[DetectedObject]] = None
+
+    @property
+    def has_center(self) -> bool:
+        return self.center_ra is not None and self.center_dec is not None
+
+
+@dataclass(frozen=True, slots=True)
 class CelestialObject:
     """Represents a detected and identified celestial object."""
     # Core identification
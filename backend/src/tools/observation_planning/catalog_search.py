@@ -141,6 +141,15 @@ for _entry in _CURATED_CATALOG:
         _CATALOG_BY_TYPE.setdefault(_normalised, []).append(_obj)
 
 
+def curated_catalog_positions() -> list[tuple[str, float, float]]:
+    """
+    Return (name, ra_deg, dec_deg) for every object in the curated catalog.
+
+    Coordinates are J2000 decimal degrees, in catalog order.
+    """
+    return [(entry[0], entry[2], entry[3]) for entry in _CURATED_CATALOG]
+
+
 # Planets that astropy can compute ephemerides for
 _PLANET_NAMES = ["mercury", "venus", "mars", "jupiter", "saturn", "uranus", "neptune"]
 
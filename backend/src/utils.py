@@ -1,3 +1,13 @@
+import functools
+import os
+import re
+from pathlib import Path
+from typing import Union
+
+
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
 def ra_to_hms(ra_deg: float) -> str:
     """Convert RA from degrees to hours, minutes, seconds format."""
     ra_hours = ra_deg / 15.0
@@ -15,3 +25,19 @@ def dec_to_dms(dec_deg: float) -> str:
     m = int((dec_abs - d) * 60)
     s = ((dec_abs - d) * 60 - m) * 60
     return f"{sign}{d}° {m}' {s:.2f}\""
+
+
+@functools.lru_cache(maxsize=8)
+def _read_prompt(path: str, mtime_ns: int) -> str:
+    return _COMMENT_RE.sub("", Path(path).read_text(encoding="utf-8"))
+
+
+def load_prompt(path: Union[str, Path]) -> str:
+    """
+    Read a prompt markdown file with HTML comments stripped.
+
+    The cleaned prompt is memoized per process and only re-read when the
+    file's mtime changes.
+    """
+    path = os.fspath(path)
+    return _read_prompt(path, os.stat(path).st_mtime_ns)
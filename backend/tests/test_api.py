@@ -0,0 +1,194 @@
+import unittest
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import orjson
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.api.analyze.controller import _event, _iterate_in_thread, _needs_refinement
+from src.api.audio_files import stat_audio_file
+from src.api.middleware import UploadLimitMiddleware
+
+
+def _make_app(max_bytes: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(image: UploadFile = File(...)):
+        return {"size": len(await image.read())}
+
+    app.add_middleware(UploadLimitMiddleware, path="/analyze", max_bytes=max_bytes)
+    return app
+
+
+class TestUploadLimitMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(_make_app(max_bytes=1024))
+
+    def test_small_multipart_upload_passes(self):
+        response = self.client.post("/analyze", files={"image": ("sky.png", b"x" * 100, "image/png")})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"size": 100})
+
+    def test_declared_oversized_upload_is_rejected(self):
+        response = self.client.post("/analyze", files={"image": ("sky.png", b"x" * 4096, "image/png")})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json(), {"error": "Upload too large"})
+
+    def test_chunked_oversized_upload_is_rejected(self):
+        boundary = "testboundary"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="image"; filename="sky.png"\r\n'
+            "Content-Type: image/png\r\n\r\n"
+        ).encode() + b"x" * 4096 + f"\r\n--{boundary}--\r\n".encode()
+
+        def chunks():
+            # A generator body is sent chunked, without a Content-Length
+            for start in range(0, len(body), 512):
+                yield body[start:start + 512]
+
+        response = self.client.post(
+            "/analyze",
+            content=chunks(),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json(), {"error": "Upload too large"})
+
+    def test_non_multipart_upload_is_rejected(self):
+        response = self.client.post("/analyze", json={"image": "..."})
+        self.assertEqual(response.status_code, 415)
+
+    def test_content_type_is_case_insensitive(self):
+        boundary = "testboundary"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="image"; filename="sky.png"\r\n'
+            "Content-Type: image/png\r\n\r\nxyz\r\n"
+            f"--{boundary}--\r\n"
+        ).encode()
+        response = self.client.post(
+            "/analyze",
+            content=body,
+            headers={"Content-Type": f"Multipart/Form-Data; boundary={boundary}"},
+        )
+        self.assertNotEqual(response.status_code, 415)
+
+    def test_other_paths_are_not_checked(self):
+        response = self.client.post("/other", json={})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestStatAudioFile(unittest.TestCase):
+
+    def setUp(self):
+        self.root = os.path.realpath(tempfile.mkdtemp())
+        self.audios_dir = os.path.join(self.root, "audios")
+        os.makedirs(self.audios_dir)
+        with open(os.path.join(self.audios_dir, "narration_1234.wav"), "wb") as f:
+            f.write(b"RIFF")
+        with open(os.path.join(self.root, "secret.txt"), "w") as f:
+            f.write("secret")
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_existing_file_is_resolved(self):
+        resolved = stat_audio_file(self.audios_dir, "narration_1234.wav")
+        self.assertIsNotNone(resolved)
+        path, stat_result = resolved
+        self.assertEqual(path, os.path.join(self.audios_dir, "narration_1234.wav"))
+        self.assertEqual(stat_result.st_size, 4)
+
+    def test_parent_directory_traversal_is_rejected(self):
+        self.assertIsNone(stat_audio_file(self.audios_dir, "../secret.txt"))
+        self.assertIsNone(stat_audio_file(self.audios_dir, os.path.join(self.root, "secret.txt")))
+
+    def test_symlink_out_of_the_directory_is_rejected(self):
+        os.symlink(os.path.join(self.root, "secret.txt"), os.path.join(self.audios_dir, "link.wav"))
+        self.assertIsNone(stat_audio_file(self.audios_dir, "link.wav"))
+
+    def test_missing_files_and_directories_are_rejected(self):
+        os.makedirs(os.path.join(self.audios_dir, "subdir.wav"))
+        self.assertIsNone(stat_audio_file(self.audios_dir, "missing.wav"))
+        self.assertIsNone(stat_audio_file(self.audios_dir, "subdir.wav"))
+
+
+class TestSseEvents(unittest.TestCase):
+
+    def test_event_framing(self):
+        frame = _event("narration_complete", {"title": "Orion", "text": "line one\nline two"})
+
+        self.assertTrue(frame.startswith(b"event: narration_complete\r\ndata: "))
+        self.assertTrue(frame.endswith(b"\r\n\r\n"))
+        data = frame[len(b"event: narration_complete\r\ndata: "):-4]
+        # Newlines in the payload are escaped, so the data stays on one line
+        self.assertNotIn(b"\n", data)
+        self.assertEqual(orjson.loads(data), {"title": "Orion", "text": "line one\nline two"})
+
+    def test_iterate_in_thread_yields_all_items(self):
+        async def collect():
+            return [item async for item in _iterate_in_thread(iter(range(100)))]
+
+        self.assertEqual(asyncio.run(collect()), list(range(100)))
+
+    def test_iterate_in_thread_yields_all_items_through_a_small_queue(self):
+        async def collect():
+            return [item async for item in _iterate_in_thread(iter(range(100)), maxsize=4)]
+
+        self.assertEqual(asyncio.run(collect()), list(range(100)))
+
+    def test_iterate_in_thread_stops_and_closes_the_iterator(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield b"chunk"
+            finally:
+                closed.set()
+
+        async def consume_one():
+            stream = _iterate_in_thread(endless(), maxsize=2)
+            async for _ in stream:
+                break
+            await stream.aclose()
+
+        asyncio.run(consume_one())
+        self.assertTrue(closed.wait(timeout=5))
+
+    def test_iterate_in_thread_raises_iterator_errors(self):
+        def failing():
+            yield 1
+            raise ValueError("TTS failed")
+
+        async def consume():
+            return [item async for item in _iterate_in_thread(failing())]
+
+        with self.assertRaises(ValueError):
+            asyncio.run(consume())
+
+
+class TestMainStructureRefinement(unittest.TestCase):
+
+    def test_confident_guess_found_in_simbad_is_used_as_is(self):
+        self.assertFalse(_needs_refinement({"name": "M 42", "confidence": 0.9}, object()))
+
+    def test_unsure_or_unknown_guesses_are_refined(self):
+        self.assertTrue(_needs_refinement({"name": "M 42", "confidence": 0.4}, object()))
+        self.assertTrue(_needs_refinement({"name": "M 42", "confidence": 0.9}, None))
+        self.assertTrue(_needs_refinement(None, None))
+        self.assertTrue(_needs_refinement({"name": "M 42", "confidence": "high"}, object()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tools.capture_sky.http_session import (
+    CircuitBreaker,
+    CircuitOpenError,
+    TimeoutHTTPAdapter,
+    create_http_session,
+    set_default_timeout,
+)
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 to the first POST and 200 to the ones after it."""
+
+    posts = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        type(self).posts += 1
+        self.send_response(503 if type(self).posts == 1 else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpSessionRetries(unittest.TestCase):
+
+    def setUp(self):
+        _FlakyHandler.posts = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/solve"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_post_is_retried_on_503(self):
+        session = create_http_session()
+
+        response = session.post(self.url, data=b"pixels", timeout=5)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_FlakyHandler.posts, 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    @patch("src.tools.capture_sky.http_session.time.monotonic")
+    def test_opens_after_consecutive_failures(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        breaker = CircuitBreaker("Test server", fail_max=2, reset_timeout=30)
+
+        breaker.before_call()
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    @patch("src.tools.capture_sky.http_session.time.monotonic")
+    def test_success_resets_the_failure_count(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        breaker = CircuitBreaker("Test server", fail_max=2, reset_timeout=30)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        breaker.before_call()  # Still closed
+
+    @patch("src.tools.capture_sky.http_session.time.monotonic")
+    def test_lets_one_trial_call_through_after_the_cooldown(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+        breaker = CircuitBreaker("Test server", fail_max=1, reset_timeout=30)
+        breaker.record_failure()
+
+        mock_monotonic.return_value = 131.0
+        breaker.before_call()  # The trial
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        # A failed trial opens the circuit again, a successful one closes it
+        breaker.record_success()
+        breaker.before_call()
+
+
+class TestDefaultTimeout(unittest.TestCase):
+
+    def test_requests_without_timeout_get_the_default(self):
+        session = requests.Session()
+        set_default_timeout(session, 7.5)
+        adapter = session.get_adapter("https://simbad.example")
+        self.assertIsInstance(adapter, TimeoutHTTPAdapter)
+
+        with patch("requests.adapters.HTTPAdapter.send", return_value=MagicMock()) as mock_send:
+            adapter.send(MagicMock())
+            self.assertEqual(mock_send.call_args.kwargs["timeout"], 7.5)
+
+            adapter.send(MagicMock(), timeout=2)
+            self.assertEqual(mock_send.call_args.kwargs["timeout"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,19 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import os
+import shutil
 import sys
+import tempfile
+
+from astropy.io.fits import Header
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.tools.capture_sky.tool import SkyCaptureTool
+from src.tools.capture_sky.types import DetectedObject, ImagePosition, PlateSolvingHints
+from src.tools.capture_sky.plate_solver.astrometry_net_solver import AstrometryNetPlateSolver
+from src.tools.capture_sky.plate_solver.plate_solver_interface import NoSolutionError
 from src.config import AppConfig
 
 class TestPlateSolver(unittest.TestCase):
@@ -50,11 +57,14 @@ class TestPlateSolver(unittest.TestCase):
     @patch("src.tools.capture_sky.tool.get_config_from_env")
     @patch("src.tools.capture_sky.tool.CustomRemotePlateSolver")
     def test_plate_solve_delegation(self, MockCustomSolver, mock_get_config):
+        storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_dir, ignore_errors=True)
+        
         # Setup config
         mock_config = MagicMock(spec=AppConfig)
         mock_config.plate_solving_method = "custom_remote"
         mock_config.plate_solving_use_cache = False
-        mock_config.storage_dir = "/tmp"
+        mock_config.storage_dir = storage_dir
         mock_config.verbose = True
         mock_get_config.return_value = mock_config
         
@@ -63,6 +73,8 @@ class TestPlateSolver(unittest.TestCase):
         mock_solver_instance.name = "MockSolver"
         expected_wcs = MagicMock()
         expected_wcs.__getitem__.return_value = 10.0 # Mock WCS values
+        header_text = Header({"CRVAL1": 10.0, "CRVAL2": 20.0}).tostring()
+        expected_wcs.tostring.return_value = header_text
         mock_solver_instance.solve.return_value = expected_wcs
         
         # Initialize tool
@@ -77,8 +89,125 @@ class TestPlateSolver(unittest.TestCase):
         result = tool._plate_solve(mock_image)
         
         # Verify solve was called
-        mock_solver_instance.solve.assert_called_once_with(mock_image)
+        mock_solver_instance.solve.assert_called_once_with(mock_image, hints=None)
+        self.assertEqual(result, expected_wcs)
+        
+        # The header was cached, with no temporary file left behind
+        logs_dir = os.path.join(storage_dir, "logs")
+        self.assertEqual(os.listdir(logs_dir), ["wcs.txt"])
+        with open(os.path.join(logs_dir, "wcs.txt"), encoding="ascii") as f:
+            self.assertEqual(f.read(), header_text)
+
+    @patch("src.tools.capture_sky.tool.get_config_from_env")
+    @patch("src.tools.capture_sky.tool.CustomRemotePlateSolver")
+    def test_failed_cache_write_leaves_no_temporary_file(self, MockCustomSolver, mock_get_config):
+        storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, storage_dir, ignore_errors=True)
+        
+        mock_config = MagicMock(spec=AppConfig)
+        mock_config.plate_solving_method = "custom_remote"
+        mock_config.plate_solving_use_cache = False
+        mock_config.storage_dir = storage_dir
+        mock_config.verbose = False
+        mock_get_config.return_value = mock_config
+        
+        expected_wcs = MagicMock()
+        expected_wcs.tostring.side_effect = ValueError("bad header")
+        MockCustomSolver.return_value.solve.return_value = expected_wcs
+        
+        tool = SkyCaptureTool()
+        result = tool._plate_solve(MagicMock())
+        
+        # The solve still succeeds, the cache is just skipped
         self.assertEqual(result, expected_wcs)
+        self.assertEqual(os.listdir(os.path.join(storage_dir, "logs")), [])
+
+    @patch("src.tools.capture_sky.tool.get_config_from_env")
+    @patch("src.tools.capture_sky.tool.CustomRemotePlateSolver")
+    def test_plate_solve_retries_without_guessed_scale(self, MockCustomSolver, mock_get_config):
+        mock_config = MagicMock(spec=AppConfig)
+        mock_config.plate_solving_method = "custom_remote"
+        mock_config.plate_solving_use_cache = False
+        mock_config.storage_dir = "/tmp"
+        mock_config.verbose = False
+        mock_get_config.return_value = mock_config
+        
+        expected_wcs = MagicMock()
+        mock_solver_instance = MockCustomSolver.return_value
+        mock_solver_instance.solve.side_effect = [NoSolutionError("no solution"), expected_wcs]
+        
+        tool = SkyCaptureTool()
+        hints = PlateSolvingHints(pixel_scale_arcsec=1.5, center_ra=10.0, center_dec=20.0, retry_without_scale=True)
+        result = tool._plate_solve(MagicMock(), hints=hints)
+        
+        # Second attempt drops only the guessed scale
+        self.assertEqual(result, expected_wcs)
+        retry_hints = mock_solver_instance.solve.call_args_list[1].kwargs["hints"]
+        self.assertIsNone(retry_hints.pixel_scale_arcsec)
+        self.assertEqual((retry_hints.center_ra, retry_hints.center_dec), (10.0, 20.0))
+
+    @patch("src.tools.capture_sky.tool.get_config_from_env")
+    @patch("src.tools.capture_sky.tool.CustomRemotePlateSolver")
+    def test_plate_solve_does_not_retry_other_errors(self, MockCustomSolver, mock_get_config):
+        mock_config = MagicMock(spec=AppConfig)
+        mock_config.plate_solving_method = "custom_remote"
+        mock_config.plate_solving_use_cache = False
+        mock_config.storage_dir = "/tmp"
+        mock_config.verbose = False
+        mock_get_config.return_value = mock_config
+        
+        mock_solver_instance = MockCustomSolver.return_value
+        mock_solver_instance.solve.side_effect = RuntimeError("timed out")
+        
+        tool = SkyCaptureTool()
+        hints = PlateSolvingHints(pixel_scale_arcsec=1.5, retry_without_scale=True)
+        with self.assertRaises(RuntimeError):
+            tool._plate_solve(MagicMock(), hints=hints)
+        mock_solver_instance.solve.assert_called_once()
+
+
+class TestAstrometryNetPlateSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.config = MagicMock(spec=AppConfig)
+        self.config.astrometry_api_key = "key"
+        self.config.plate_solving_timeout = 30
+        self.image = MagicMock(size=(800, 600))
+
+    @patch("src.tools.capture_sky.plate_solver.astrometry_net_solver.AstrometryNet")
+    def test_detected_sources_are_submitted_without_detecting_again(self, MockAstrometryNet):
+        solver = AstrometryNetPlateSolver(self.config)
+        solver.source_detector = MagicMock()
+        expected_wcs = MagicMock()
+        MockAstrometryNet.return_value.solve_from_source_list.return_value = expected_wcs
+        sources = [
+            DetectedObject(position=ImagePosition(pixel_x=float(i), pixel_y=2.0 * i, radius_px=1.0), brightness=100.0 - i)
+            for i in range(60)
+        ]
+
+        result = solver.solve(self.image, hints=PlateSolvingHints(detected_sources=sources))
+
+        self.assertEqual(result, expected_wcs)
+        solver.source_detector.detect.assert_not_called()
+        x, y, width, height = MockAstrometryNet.return_value.solve_from_source_list.call_args.args
+        # Only the brightest sources, in FITS (1-based) pixel coordinates
+        self.assertEqual(len(x), AstrometryNetPlateSolver.MAX_SOURCES)
+        self.assertEqual((x[0], y[0]), (1.0, 1.0))
+        self.assertEqual((width, height), (800, 600))
+
+    @patch("src.tools.capture_sky.plate_solver.astrometry_net_solver.AstrometryNet")
+    def test_sources_are_detected_when_none_are_given(self, MockAstrometryNet):
+        solver = AstrometryNetPlateSolver(self.config)
+        solver.source_detector = MagicMock()
+        solver.source_detector.detect.return_value = [
+            DetectedObject(position=ImagePosition(pixel_x=float(i), pixel_y=float(i), radius_px=1.0), brightness=10.0)
+            for i in range(10)
+        ]
+
+        solver.solve(self.image)
+
+        solver.source_detector.detect.assert_called_once_with(self.image)
+        MockAstrometryNet.return_value.solve_from_source_list.assert_called_once()
 
 if __name__ == "__main__":
     unittest.main()
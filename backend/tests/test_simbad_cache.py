@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.tools.capture_sky.simbad_cache import (
+    MemoryCache,
+    SimbadDiskCache,
+    get_simbad_disk_cache,
+    normalize_simbad_identifier,
+)
+from src.tools.capture_sky.types import CelestialObject, CelestialPosition
+
+
+def _make_object(name="M 42"):
+    return CelestialObject(
+        name=name,
+        catalog="Messier",
+        position=CelestialPosition(ra=83.82, dec=-5.39, radius_arcsec=3900.0),
+        object_type_description="HII Region",
+        alternative_names=["NGC 1976", "Orion Nebula"],
+        magnitude_visual=4.0,
+    )
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_returns_stored_value(self):
+        cache = MemoryCache(maxsize=4, ttl_seconds=60)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("missing"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = MemoryCache(maxsize=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        # Reading "a" makes "b" the least recently used entry
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    @patch("src.tools.capture_sky.simbad_cache.time.monotonic")
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        cache = MemoryCache(maxsize=4, ttl_seconds=10)
+        mock_monotonic.return_value = 100.0
+        cache.put("a", 1)
+
+        mock_monotonic.return_value = 109.0
+        self.assertEqual(cache.get("a"), 1)
+        mock_monotonic.return_value = 111.0
+        self.assertIsNone(cache.get("a"))
+
+
+class TestSimbadDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.storage_dir = tempfile.mkdtemp()
+        self.cache = SimbadDiskCache(os.path.join(self.storage_dir, "simbad_cache.sqlite"))
+
+    def tearDown(self):
+        shutil.rmtree(self.storage_dir, ignore_errors=True)
+
+    def test_object_round_trip(self):
+        obj = _make_object()
+        self.cache.put("M42", obj)
+
+        self.assertEqual(self.cache.get("M42"), obj)
+        self.assertIsNone(self.cache.get("UNKNOWN"))
+
+    def test_cached_miss_is_told_apart_from_missing_entry(self):
+        self.cache.put("NOTHING", None)
+
+        self.assertEqual(self.cache.lookup("NOTHING"), (True, None))
+        self.assertEqual(self.cache.lookup("UNKNOWN"), (False, None))
+
+    def test_put_many_stores_objects_and_misses(self):
+        obj = _make_object()
+        self.cache.put_many([("a", obj), ("b", None)])
+
+        self.assertEqual(self.cache.lookup("a"), (True, obj))
+        self.assertEqual(self.cache.lookup("b"), (True, None))
+
+    def test_old_entries_count_as_not_found(self):
+        self.cache.put("M42", _make_object())
+
+        with patch("src.tools.capture_sky.simbad_cache.time.time", return_value=time.time() + 3600):
+            self.assertEqual(self.cache.lookup("M42", max_age_seconds=60), (False, None))
+            self.assertTrue(self.cache.lookup("M42", max_age_seconds=7200)[0])
+
+    def test_unusable_path_behaves_as_empty(self):
+        # A file where the cache directory should be
+        blocker = os.path.join(self.storage_dir, "blocker")
+        with open(blocker, "w") as f:
+            f.write("")
+        cache = SimbadDiskCache(os.path.join(blocker, "simbad_cache.sqlite"))
+
+        with self.assertLogs("src.tools.capture_sky.simbad_cache", level="WARNING"):
+            cache.put("M42", _make_object())
+        self.assertIsNone(cache.get("M42"))
+
+    def test_shared_cache_per_storage_dir(self):
+        self.assertIs(get_simbad_disk_cache(self.storage_dir), get_simbad_disk_cache(self.storage_dir))
+
+
+class TestNormalizeSimbadIdentifier(unittest.TestCase):
+
+    def test_spacing_and_case_are_ignored(self):
+        self.assertEqual(normalize_simbad_identifier("M 31"), "M31")
+        self.assertEqual(normalize_simbad_identifier("m  31"), "M31")
+        self.assertEqual(normalize_simbad_identifier("NGC 1976"), normalize_simbad_identifier("ngc1976"))
+
+if __name__ == "__main__":
+    unittest.main()
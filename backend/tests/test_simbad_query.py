@@ -0,0 +1,178 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import dataclasses
+import os
+import sys
+
+from astropy.table import Table
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.config import get_config_from_env
+from src.tools.capture_sky.simbad_query import (
+    _TokenBucket,
+    _is_throttled,
+    _query_simbad_region_batch,
+    _query_with_failover,
+    _spatial_order,
+)
+from src.tools.capture_sky.types import CelestialPosition
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    @patch("src.tools.capture_sky.simbad_query.time.sleep")
+    @patch("src.tools.capture_sky.simbad_query.time.monotonic")
+    def test_bursts_up_to_capacity_then_waits(self, mock_monotonic, mock_sleep):
+        now = [100.0]
+        mock_monotonic.side_effect = lambda: now[0]
+        # Sleeping advances the fake clock
+        mock_sleep.side_effect = lambda seconds: now.__setitem__(0, now[0] + seconds)
+
+        bucket = _TokenBucket(rate=2, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        mock_sleep.assert_not_called()
+
+        bucket.acquire()
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 0.5)
+
+    @patch("src.tools.capture_sky.simbad_query.time.sleep")
+    @patch("src.tools.capture_sky.simbad_query.time.monotonic")
+    def test_tokens_refill_over_time(self, mock_monotonic, mock_sleep):
+        mock_monotonic.return_value = 100.0
+        bucket = _TokenBucket(rate=2, capacity=2)
+        bucket.acquire()
+        bucket.acquire()
+
+        # One second later both tokens are back
+        mock_monotonic.return_value = 101.0
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+
+
+class TestThrottleBackoff(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dataclasses.replace(get_config_from_env(), simbad_mirrors=("primary", "secondary"))
+
+    def test_throttled_errors_are_recognized_through_causes(self):
+        response = MagicMock(status_code=429)
+        throttled = RuntimeError("rate limited")
+        throttled.response = response
+        try:
+            try:
+                raise throttled
+            except RuntimeError as e:
+                raise ValueError("wrapped") from e
+        except ValueError as wrapped:
+            self.assertTrue(_is_throttled(wrapped))
+
+        self.assertFalse(_is_throttled(RuntimeError("no response")))
+
+    @patch("src.tools.capture_sky.simbad_query.time.sleep")
+    @patch("src.tools.capture_sky.simbad_query._rate_limiter")
+    def test_throttled_mirror_is_retried(self, mock_rate_limiter, mock_sleep):
+        throttled = RuntimeError("rate limited")
+        throttled.response = MagicMock(status_code=503)
+        query = MagicMock(side_effect=[throttled, "result"])
+
+        self.assertEqual(_query_with_failover(self.config, query), "result")
+        self.assertEqual([c.args[0] for c in query.call_args_list], ["primary", "primary"])
+        mock_sleep.assert_called_once()
+
+
+class TestFailover(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dataclasses.replace(get_config_from_env(), simbad_mirrors=("primary", "secondary"))
+
+    @patch("src.tools.capture_sky.simbad_query._rate_limiter")
+    def test_failing_mirror_moves_on_to_the_next(self, mock_rate_limiter):
+        calls = []
+
+        def query(server):
+            calls.append(server)
+            if server == "primary":
+                raise TimeoutError("stalled")
+            return "result"
+
+        with self.assertLogs("src.tools.capture_sky.simbad_query", level="WARNING"):
+            self.assertEqual(_query_with_failover(self.config, query), "result")
+        self.assertEqual(calls, ["primary", "secondary"])
+
+
+class TestSpatialOrder(unittest.TestCase):
+
+    def test_sorts_by_declination_zone_then_ra(self):
+        positions = [
+            CelestialPosition(ra=50.0, dec=10.2, radius_arcsec=5),
+            CelestialPosition(ra=10.0, dec=11.5, radius_arcsec=5),
+            CelestialPosition(ra=20.0, dec=10.8, radius_arcsec=5),
+            CelestialPosition(ra=5.0, dec=-3.0, radius_arcsec=5),
+        ]
+        self.assertEqual(list(_spatial_order(positions)), [3, 2, 0, 1])
+
+
+class TestRegionBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.config = dataclasses.replace(get_config_from_env(), simbad_search_radius_arcsec=10.0)
+
+    @patch("src.tools.capture_sky.simbad_query._query_with_failover")
+    def test_rows_are_matched_to_the_closest_position_within_radius(self, mock_failover):
+        mock_failover.return_value = Table({
+            "main_id": ["* alf Ori", "* bet Ori", "* far away"],
+            "ra": [88.7929, 78.6345, 120.0],
+            "dec": [7.4071, -8.2016, 40.0],
+            "otype": ["*", "*", "*"],
+            "ids": ["NAME Betelgeuse|HD 39801", "NAME Rigel|HD 34085", "HD 1"],
+        })
+        positions = [
+            CelestialPosition(ra=78.6345 + 1 / 3600, dec=-8.2016, radius_arcsec=5),   # Rigel, 1" off in RA
+            CelestialPosition(ra=10.0, dec=10.0, radius_arcsec=5),                     # Nothing nearby
+            CelestialPosition(ra=88.7929, dec=7.4071 + 3 / 3600, radius_arcsec=5),    # Betelgeuse, 3" off
+        ]
+
+        results = _query_simbad_region_batch(positions, self.config)
+
+        self.assertEqual([r.name if r else None for r in results], ["Rigel", None, "Betelgeuse"])
+
+    @patch("src.tools.capture_sky.simbad_query._get_simbad")
+    @patch("src.tools.capture_sky.simbad_query._query_with_failover")
+    def test_each_position_is_queried_and_matched_with_its_own_radius(self, mock_failover, mock_get_simbad):
+        mock_failover.side_effect = lambda config, query: query("primary")
+        mock_get_simbad.return_value.query_region.return_value = Table({
+            "main_id": ["* alf Ori", "* bet Ori"],
+            "ra": [88.7929, 78.6345],
+            "dec": [7.4071 + 20 / 3600, -8.2016 + 20 / 3600],
+            "otype": ["*", "*"],
+            "ids": ["NAME Betelgeuse|HD 39801", "NAME Rigel|HD 34085"],
+        })
+        positions = [
+            CelestialPosition(ra=88.7929, dec=7.4071, radius_arcsec=5),     # Betelgeuse 20" away, radius 10"
+            CelestialPosition(ra=78.6345, dec=-8.2016, radius_arcsec=30),   # Rigel 20" away, radius 30"
+        ]
+
+        results = _query_simbad_region_batch(positions, self.config)
+
+        radius = mock_get_simbad.return_value.query_region.call_args.kwargs["radius"]
+        self.assertEqual(list(radius.to_value("arcsec")), [10.0, 30.0])
+        self.assertEqual([r.name if r else None for r in results], [None, "Rigel"])
+
+    @patch("src.tools.capture_sky.simbad_query.REGION_BATCH_SIZE", 2)
+    @patch("src.tools.capture_sky.simbad_query._query_with_failover")
+    def test_positions_are_queried_in_chunks(self, mock_failover):
+        mock_failover.return_value = None
+        positions = [CelestialPosition(ra=float(i), dec=0.0, radius_arcsec=5) for i in range(5)]
+
+        results = _query_simbad_region_batch(positions, self.config)
+
+        self.assertEqual(results, [None] * 5)
+        self.assertEqual(mock_failover.call_count, 3)
+
+if __name__ == "__main__":
+    unittest.main()
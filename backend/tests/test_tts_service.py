@@ -0,0 +1,27 @@
+import unittest
+import io
+import os
+import sys
+import wave
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.services.tts_service import _wav_header
+
+
+class TestWavHeader(unittest.TestCase):
+
+    def test_header_matches_the_wave_module(self):
+        pcm = bytes(range(256)) * 10
+        header = _wav_header(len(pcm), channels=1, rate=24000, sample_width=2)
+        self.assertEqual(len(header), 44)
+
+        with wave.open(io.BytesIO(header + pcm), "rb") as wav:
+            self.assertEqual(wav.getnchannels(), 1)
+            self.assertEqual(wav.getframerate(), 24000)
+            self.assertEqual(wav.getsampwidth(), 2)
+            self.assertEqual(wav.readframes(wav.getnframes()), pcm)
+
+if __name__ == "__main__":
+    unittest.main()